@@ -0,0 +1,330 @@
+"""
+Benchmark suite for Nightwatch.
+
+Generates a synthetic database through the real schema, then times service
+calls, the HTTP API (in-process, with concurrent simulated kiosks), system
+snapshots and the daily backup. Results are written as JSON and can be
+compared against a stored baseline.
+
+    python benchmarks/bench.py run --out results.json
+    python benchmarks/bench.py run --baseline baseline.json --threshold 0.25
+    python benchmarks/bench.py compare results.json baseline.json
+    python benchmarks/bench.py generate /tmp/big.db --shifts 2000 --tasks-per-shift 50
+
+Everything runs against a temporary data dir; the configured database is never
+touched. The API benchmark needs httpx (already required by FastAPI's
+TestClient).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+_WORDS = (
+    "check backup rotate logs restart service verify disk patch kernel review alerts call vendor "
+    "update ticket swap tape inspect rack clear queue drain node reboot router confirm sync"
+).split()
+
+
+def _ts(dt: datetime) -> str:
+    # Same text format SQLAlchemy's SQLite DateTime type writes.
+    return dt.strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+def generate(
+    db_path: Path,
+    shifts: int = 500,
+    tasks_per_shift: int = 40,
+    notes_bytes: int = 4096,
+    open_tasks: int = 200,
+    seed: int = 1,
+) -> dict:
+    """
+    Build a synthetic database at `db_path` through the bundled migrations.
+    All shifts but the last are closed; the last is active and holds
+    `open_tasks` unfinished tasks (what the next start_shift carries over).
+    """
+    from nightwatch.migrate import apply_migrations
+
+    rng = random.Random(seed)
+    db_path.unlink(missing_ok=True)
+    apply_migrations(db_path)
+    conn = sqlite3.connect(db_path)
+    try:
+        start = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(hours=12 * shifts)
+        for i in range(shifts):
+            began = start + timedelta(hours=12 * i)
+            active = i == shifts - 1
+            words = []
+            while sum(len(w) + 1 for w in words) < notes_bytes:
+                words.append(rng.choice(_WORDS))
+            cur = conn.execute(
+                "INSERT INTO shifts(started_at, ended_at, notes) VALUES (?, ?, ?)",
+                (_ts(began), None if active else _ts(began + timedelta(hours=11)), " ".join(words)[:notes_bytes]),
+            )
+            shift_id = cur.lastrowid
+            n = open_tasks if active else tasks_per_shift
+            rows = []
+            for j in range(n):
+                created = began + timedelta(minutes=j)
+                done = None if active else _ts(created + timedelta(minutes=rng.randint(1, 600)))
+                title = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(2, 6)))
+                rows.append((title, _ts(created), done, shift_id))
+            conn.executemany(
+                "INSERT INTO tasks(title, created_at, completed_at, shift_id) VALUES (?, ?, ?, ?)", rows
+            )
+        conn.commit()
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+    return {
+        "shifts": shifts,
+        "tasks_per_shift": tasks_per_shift,
+        "notes_bytes": notes_bytes,
+        "open_tasks": open_tasks,
+        "seed": seed,
+        "db_bytes": db_path.stat().st_size,
+    }
+
+
+def _stats(samples: list[float], **extra: float) -> dict:
+    ms = sorted(s * 1000.0 for s in samples)
+    return {
+        "n": len(ms),
+        "median_ms": round(statistics.median(ms), 4),
+        "p95_ms": round(ms[min(len(ms) - 1, int(len(ms) * 0.95))], 4),
+        "mean_ms": round(statistics.fmean(ms), 4),
+        "min_ms": round(ms[0], 4),
+        **extra,
+    }
+
+
+def _time(fn: Callable[[], object], repeat: int, setup: Callable[[], object] | None = None) -> list[float]:
+    out = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        t = time.perf_counter()
+        fn()
+        out.append(time.perf_counter() - t)
+    return out
+
+
+def bench_services(repeat: int) -> dict:
+    from nightwatch import services
+    from nightwatch.db import SessionLocal
+
+    results = {}
+    with SessionLocal() as db:
+        results["services.list_tasks_for_active_shift"] = _stats(
+            _time(lambda: services.list_tasks_for_active_shift(db), repeat)
+        )
+
+        samples = []
+        carried = 0
+        for _ in range(repeat):
+            services.end_shift(db)
+            t = time.perf_counter()
+            _, carried, _ = services.start_shift(db)
+            samples.append(time.perf_counter() - t)
+        results["services.start_shift_carry_over"] = _stats(samples, carried=carried)
+
+        n = iter(range(10**9))
+        results["services.add_task"] = _stats(_time(lambda: services.add_task(db, f"bench task {next(n)}"), repeat))
+    return results
+
+
+def bench_api(kiosks: int, rounds: int) -> dict:
+    import httpx
+
+    from nightwatch.app import create_app
+
+    app = create_app()
+    paths = ("/api/shift/current", "/api/tasks/current", "/api/system")
+    lat: dict[str, list[float]] = {p: [] for p in (*paths, "POST /api/tasks")}
+
+    async def kiosk(c: httpx.AsyncClient, k: int) -> None:
+        for r in range(rounds):
+            for p in paths:
+                t = time.perf_counter()
+                resp = await c.get(p)
+                lat[p].append(time.perf_counter() - t)
+                resp.raise_for_status()
+            if r % 5 == 0:
+                t = time.perf_counter()
+                resp = await c.post("/api/tasks", json={"title": f"kiosk {k} round {r}"})
+                lat["POST /api/tasks"].append(time.perf_counter() - t)
+                resp.raise_for_status()
+
+    async def main() -> float:
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as c:
+                await c.get("/api/system")  # first sample primes the CPU baseline
+                t = time.perf_counter()
+                await asyncio.gather(*(kiosk(c, k) for k in range(kiosks)))
+                return time.perf_counter() - t
+
+    elapsed = asyncio.run(main())
+    total = sum(len(v) for v in lat.values())
+    results = {f"api.{p if p.startswith('POST') else 'GET ' + p}": _stats(v) for p, v in lat.items()}
+    results["api.kiosks"] = {"kiosks": kiosks, "requests": total, "req_per_s": round(total / elapsed, 1)}
+    return results
+
+
+def bench_snapshot(repeat: int) -> dict:
+    from nightwatch.system_watch import read_system_snapshot
+
+    read_system_snapshot()  # CPU baseline; later calls don't block
+    return {"system.read_system_snapshot": _stats(_time(lambda: read_system_snapshot(cpu_interval=None), repeat))}
+
+
+def bench_backup(db_path: Path, backups_dir: Path, repeat: int) -> dict:
+    from nightwatch.backup import ensure_daily_backup
+
+    def clear() -> None:
+        shutil.rmtree(backups_dir, ignore_errors=True)
+
+    samples = _time(lambda: ensure_daily_backup(db_path, backups_dir), repeat, setup=clear)
+    return {"backup.ensure_daily_backup": _stats(samples, db_bytes=db_path.stat().st_size)}
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Print a comparison table; return the names whose median regressed by more than `threshold`."""
+    regressed = []
+    base = baseline.get("results", {})
+    print(f"{'benchmark':45} {'baseline':>11} {'now':>11} {'change':>8}")
+    for name, cur in results.get("results", {}).items():
+        old = base.get(name, {})
+        if "median_ms" not in cur or "median_ms" not in old:
+            continue
+        ratio = cur["median_ms"] / old["median_ms"] if old["median_ms"] else 1.0
+        flag = ""
+        if ratio > 1.0 + threshold:
+            flag = "  REGRESSED"
+            regressed.append(name)
+        print(f"{name:45} {old['median_ms']:>9.3f}ms {cur['median_ms']:>9.3f}ms {ratio - 1:>+7.0%}{flag}")
+    return regressed
+
+
+def _isolate(data_dir: Path) -> None:
+    # Must run before nightwatch.db is imported: settings and engines are created once.
+    os.environ["NIGHTWATCH_CONFIG"] = os.devnull
+    os.environ["NIGHTWATCH_DATA_DIR"] = str(data_dir)
+    os.environ["NIGHTWATCH_DB_PATH"] = str(data_dir / "nightwatch.db")
+    os.environ["NIGHTWATCH_METRICS_DB_PATH"] = str(data_dir / "metrics.db")
+    os.environ["NIGHTWATCH_BACKUPS_DIR"] = str(data_dir / "backups")
+    os.environ["NIGHTWATCH_CONTROL_SOCKET"] = ""
+
+
+def cmd_run(args: argparse.Namespace) -> int:
+    data_dir = Path(tempfile.mkdtemp(prefix="nightwatch-bench-"))
+    try:
+        _isolate(data_dir)
+        db_path = data_dir / "nightwatch.db"
+        dataset = generate(db_path, args.shifts, args.tasks_per_shift, args.notes_bytes, args.open_tasks, args.seed)
+
+        from nightwatch import __version__
+        from nightwatch.config import get_settings
+
+        results: dict = {}
+        results |= bench_services(args.repeat)
+        results |= bench_snapshot(args.repeat)
+        results |= bench_api(args.kiosks, args.rounds)
+        results |= bench_backup(db_path, data_dir / "bench-backups", max(3, args.repeat // 10))
+
+        out = {
+            "meta": {
+                "nightwatch": __version__,
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "machine": platform.machine(),
+                "at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "journal_mode": get_settings().journal_mode,
+                "synchronous": get_settings().synchronous,
+                "dataset": dataset,
+            },
+            "results": results,
+        }
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    text = json.dumps(out, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        return 1 if compare(out, baseline, args.threshold) else 0
+    return 0
+
+
+def cmd_compare(args: argparse.Namespace) -> int:
+    results = json.loads(Path(args.results).read_text(encoding="utf-8"))
+    baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+    return 1 if compare(results, baseline, args.threshold) else 0
+
+
+def cmd_generate(args: argparse.Namespace) -> int:
+    meta = generate(Path(args.path), args.shifts, args.tasks_per_shift, args.notes_bytes, args.open_tasks, args.seed)
+    print(json.dumps(meta))
+    return 0
+
+
+def _dataset_args(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--shifts", default=500, type=int)
+    p.add_argument("--tasks-per-shift", default=40, type=int)
+    p.add_argument("--notes-bytes", default=4096, type=int)
+    p.add_argument("--open-tasks", default=200, type=int, help="unfinished tasks in the active shift")
+    p.add_argument("--seed", default=1, type=int)
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    sp = sub.add_parser("run", help="generate a dataset and run every benchmark")
+    _dataset_args(sp)
+    sp.add_argument("--repeat", default=50, type=int, help="iterations per micro-benchmark")
+    sp.add_argument("--kiosks", default=8, type=int, help="concurrent simulated dashboards")
+    sp.add_argument("--rounds", default=25, type=int, help="poll rounds per kiosk")
+    sp.add_argument("--out", default=None, help="write JSON here (default: stdout)")
+    sp.add_argument("--baseline", default=None, help="compare against this JSON; exit 1 on regression")
+    sp.add_argument("--threshold", default=0.25, type=float, help="allowed median slowdown (0.25 = 25%%)")
+    sp.set_defaults(func=cmd_run)
+
+    sp = sub.add_parser("compare", help="compare two result files")
+    sp.add_argument("results")
+    sp.add_argument("baseline")
+    sp.add_argument("--threshold", default=0.25, type=float)
+    sp.set_defaults(func=cmd_compare)
+
+    sp = sub.add_parser("generate", help="write a synthetic database")
+    sp.add_argument("path")
+    _dataset_args(sp)
+    sp.set_defaults(func=cmd_generate)
+
+    args = p.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,72 @@
+"""
+Import-time guard for the CLI.
+
+`nightwatch status` / `nightwatch tasks` are meant to be instant from a shell
+prompt or cron, so importing the CLI must not drag in the web or ORM stack.
+This script fails (exit 1) if any of those modules get imported by
+`import nightwatch.__main__`, or if the median import time exceeds the budget.
+
+    python benchmarks/import_time.py [--runs 7] [--budget-ms 150]
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+TARGET = "nightwatch.__main__"
+# Heavy modules only the server (or the full read path) should pull in.
+FORBIDDEN = ("fastapi", "starlette", "uvicorn", "pydantic", "sqlalchemy", "psutil")
+
+
+def _importtime(module: str) -> dict[str, int]:
+    """Top-level package -> cumulative import time (us), from `python -X importtime`."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    out: dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:") :].split("|"))
+        if not cumulative.isdigit():
+            continue  # header line
+        top = name.split(".")[0]
+        if name == top or name == module:
+            out[name] = max(out.get(name, 0), int(cumulative))
+    return out
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--runs", default=7, type=int)
+    p.add_argument("--budget-ms", default=150.0, type=float, help="max median import time of the CLI")
+    args = p.parse_args()
+
+    first = _importtime(TARGET)
+    leaked = sorted(m for m in FORBIDDEN if m in first)
+    samples = [first.get(TARGET, 0) / 1000]
+    samples += [_importtime(TARGET).get(TARGET, 0) / 1000 for _ in range(args.runs - 1)]
+    median = statistics.median(samples)
+
+    print(f"import {TARGET}: median {median:.1f} ms over {len(samples)} runs (budget {args.budget_ms:.0f} ms)")
+    ok = True
+    if leaked:
+        print(f"FAIL: heavy modules imported at CLI start: {', '.join(leaked)}")
+        ok = False
+    if median > args.budget_ms:
+        print("FAIL: over budget")
+        ok = False
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+# `nightwatch agent`: sample this machine and push gzip-compressed batches to
+# a Nightwatch server's POST /api/ingest. Samples that fail to send stay
+# queued (bounded) and go out with the next push.
+
+import gzip
+import http.client
+import json
+import socket
+import threading
+import time
+import urllib.request
+from collections import deque
+from urllib.parse import urlsplit
+
+from nightwatch import jsonenc
+from nightwatch.system_watch import CollectorScheduler, default_collectors
+
+# Unsent samples kept while the server is unreachable (10 minutes at 1 s).
+QUEUE_LIMIT = 600
+PUSH_TIMEOUT_S = 5.0
+
+
+def ingest_url(url: str) -> str:
+    """Accept a server base URL ("http://host:8037") or the full ingest URL."""
+    url = url.rstrip("/")
+    return url if urlsplit(url).path.endswith("/api/ingest") else url + "/api/ingest"
+
+
+def push(url: str, host: str, samples: list[dict], token: str = "") -> int:
+    """POST one batch; returns how many samples the server stored."""
+    body = gzip.compress(jsonenc.dumps({"host": host, "samples": samples}), 6)
+    headers = {"Content-Type": "application/json", "Content-Encoding": "gzip"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    req = urllib.request.Request(url, data=body, headers=headers, method="POST")
+    with urllib.request.urlopen(req, timeout=PUSH_TIMEOUT_S) as res:
+        return int(json.loads(res.read()).get("stored", 0))
+
+
+def run_agent(
+    url: str,
+    host: str | None = None,
+    interval_s: float = 1.0,
+    push_every_s: float = 5.0,
+    token: str = "",
+    stop: threading.Event | None = None,
+    on_error=None,
+    intervals: dict[str, float] | None = None,
+) -> None:
+    """Sample every `interval_s`, push every `push_every_s`, until `stop` is set."""
+    url = ingest_url(url)
+    host = host or socket.gethostname()
+    stop = stop or threading.Event()
+    queue: deque[dict] = deque(maxlen=QUEUE_LIMIT)
+    # Same collectors and cadences as the server's own sampler.
+    scheduler = CollectorScheduler(default_collectors(), intervals)
+    next_push = time.monotonic() + push_every_s
+    try:
+        while not stop.is_set():
+            started = time.monotonic()
+            try:
+                queue.append(scheduler.collect(interval_s))
+            except Exception as e:
+                if on_error:
+                    on_error(e)
+            if started >= next_push and queue:
+                batch = list(queue)
+                try:
+                    push(url, host, batch, token)
+                    queue.clear()
+                except (OSError, http.client.HTTPException, ValueError) as e:
+                    if on_error:
+                        on_error(e)
+                next_push = started + push_every_s
+            stop.wait(max(0.0, interval_s - (time.monotonic() - started)))
+    finally:
+        # Best effort to send what's left when stopping (including Ctrl-C).
+        if queue:
+            try:
+                push(url, host, list(queue), token)
+            except Exception:
+                pass
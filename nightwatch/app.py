@@ -1,35 +1,74 @@
 from __future__ import annotations
 
 import asyncio
+import hmac
+import zlib
 from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
+from typing import Literal
 
-from fastapi import Depends, FastAPI, HTTPException, Response
-from fastapi.responses import FileResponse
-from fastapi.staticfiles import StaticFiles
-from sqlalchemy.orm import Session
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from nightwatch.db import get_db, init_db
+from nightwatch import dataversion, jsonenc
+from nightwatch.archive import run_scheduled_archive
+from nightwatch.assets import AssetFiles, asset_response, build_assets
+from nightwatch.backup import backup_progress, run_scheduled_backup
+from nightwatch.config import get_settings
+from nightwatch.control_server import ControlServer, build_handlers
+from nightwatch.db import AsyncSessionLocal, dispose_async_engine, get_async_db, init_db
+from nightwatch.events import hub, sse_frame
+from nightwatch.hosts import HostRegistry
+from nightwatch.metrics_store import MetricsStore
 from nightwatch.schemas import (
+    BackupStatusOut,
+    ChangesOut,
+    CollectorOut,
+    HostOut,
+    ProcessesOut,
+    IngestIn,
+    IngestOut,
+    SearchOut,
     ShiftNotesIn,
     ShiftOut,
+    ShiftPageOut,
     ShiftStartOut,
+    SystemHistoryOut,
     SystemOut,
+    TaskBatchIn,
+    TaskBatchOut,
     TaskIn,
     TaskOut,
+    TaskPageOut,
 )
-from nightwatch.services import (
+from nightwatch.async_services import (
+    active_shift_row,
+    active_task_rows,
     add_task,
+    apply_task_batch,
+    changes_since,
+    use_writer,
     complete_task,
     delete_task,
     end_shift,
-    get_active_shift,
-    list_tasks_for_active_shift,
+    get_shift,
+    list_shifts,
+    list_tasks_for_shift,
+    prune_change_log,
     reopen_task,
+    search,
     set_shift_notes,
     start_shift,
 )
-from nightwatch.system_watch import read_system_snapshot
+from nightwatch.services import SHIFT_FIELDS, TASK_FIELDS
+from nightwatch.system_watch import ProcessMonitor, SystemSampler
+from nightwatch.telemetry import TimingMiddleware, registry
+from nightwatch.writer import WriteQueue
 
 
 def _shift_out(s) -> ShiftOut:
@@ -46,23 +85,102 @@ def _task_out(t) -> TaskOut:
     )
 
 
+BACKUP_START_DELAY_S = 10.0
+# Largest agent batch accepted by /api/ingest, both as sent and decompressed.
+INGEST_MAX_BYTES = 4 * 1024 * 1024
+
+
+def _etag_matches(request: Request, tag: str) -> bool:
+    inm = request.headers.get("if-none-match")
+    if not inm:
+        return False
+    return inm.strip() == "*" or tag in (v.strip() for v in inm.split(","))
+
+
+async def _read_capped(request: Request, limit: int) -> bytes:
+    """Request body, refused with 413 as soon as it is known to exceed `limit` bytes."""
+    try:
+        declared = int(request.headers.get("content-length", "0"))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Bad Content-Length.")
+    if declared > limit:
+        raise HTTPException(status_code=413, detail="Batch too large.")
+    chunks: list[bytes] = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > limit:
+            raise HTTPException(status_code=413, detail="Batch too large.")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def _validator_headers(tag: str) -> dict[str, str]:
+    # Clients may keep the body but must revalidate every time.
+    return {"ETag": tag, "Cache-Control": "no-cache"}
+
+
 def create_app() -> FastAPI:
     async def _backup_loop() -> None:
-        # init_db() already does a daily backup once; loop keeps it daily.
-        from nightwatch.backup import ensure_daily_backup
-        from nightwatch.config import get_settings
-
+        # Startup skips the backup; the first check runs once the server is serving.
+        # The copy itself runs on a worker thread (see nightwatch.backup).
+        await asyncio.sleep(BACKUP_START_DELAY_S)
         while True:
-            ensure_daily_backup(get_settings().db_path, get_settings().backups_dir)
+            try:
+                # Archive first so the backup reflects the smaller live database.
+                await asyncio.to_thread(run_scheduled_archive, get_settings())
+            except Exception:
+                # Nothing is lost on failure (each chunk is one transaction); retried next round.
+                pass
+            try:
+                async with AsyncSessionLocal() as db:
+                    await prune_change_log(db)
+            except Exception:
+                pass
+            try:
+                await asyncio.to_thread(run_scheduled_backup, get_settings())
+            except Exception:
+                # Recorded in backup_progress(); try again next round.
+                pass
             await asyncio.sleep(30 * 60)
 
     @asynccontextmanager
-    async def lifespan(_: FastAPI):
-        init_db()
+    async def lifespan(app: FastAPI):
+        init_db(backup=False)
+        app.state.metrics = MetricsStore(get_settings().metrics_db_path)
+        app.state.sampler.interval_s = get_settings().sample_interval_s
+        app.state.sampler.scheduler.configure(dict(get_settings().collector_intervals))
+        app.state.sampler.add_listener(app.state.metrics.append)
+        app.state.sampler.add_listener(
+            lambda snap: hub.publish("system", SystemOut(**snap).model_dump(mode="json"))
+        )
+        app.state.sampler.start()
+        writer = None
+        if get_settings().group_commit:
+            writer = WriteQueue(window_s=get_settings().group_commit_window_ms / 1000.0)
+            writer.start()
+            use_writer(writer)
+        control = None
+        if get_settings().control_socket is not None:
+            control = ControlServer(get_settings().control_socket, build_handlers(app.state.sampler))
+            if not await control.start():
+                control = None  # another server owns the socket; leave it alone
         task = asyncio.create_task(_backup_loop())
+        restore_signals = hub.close_on_exit_signals()
         try:
             yield
         finally:
+            # End open event streams first; they never finish on their own.
+            hub.close()
+            restore_signals()
+            if control is not None:
+                await control.stop()
+            if writer is not None:
+                use_writer(None)
+                await asyncio.to_thread(writer.stop)
+            app.state.sampler.stop()
+            app.state.metrics.close()
+            await dispose_async_engine()
             task.cancel()
             try:
                 await task
@@ -71,19 +189,25 @@ def create_app() -> FastAPI:
             except Exception:
                 pass
             # Final backup attempt on shutdown.
-            from nightwatch.backup import ensure_daily_backup
-            from nightwatch.config import get_settings
-
-            ensure_daily_backup(get_settings().db_path, get_settings().backups_dir)
+            try:
+                await asyncio.to_thread(run_scheduled_backup, get_settings())
+            except Exception:
+                pass
 
     app = FastAPI(title="Nightwatch OS Dashboard", version="0.1.0", lifespan=lifespan)
+    app.state.sampler = SystemSampler()
+    app.state.hosts = HostRegistry()
+    app.state.processes = ProcessMonitor()
+    app.state.sampler.scheduler.add(app.state.processes)
+    app.add_middleware(TimingMiddleware)
 
-    static_dir = Path(__file__).parent / "static"
-    app.mount("/static", StaticFiles(directory=static_dir), name="static")
+    # Hashed, precompressed, in-memory copies of static/ (see nightwatch.assets).
+    index_page, static_files = build_assets(Path(__file__).parent / "static")
+    app.mount("/static", AssetFiles(static_files), name="static")
 
     @app.get("/")
-    def index() -> Response:
-        return FileResponse(static_dir / "index.html")
+    def index(request: Request) -> Response:
+        return asset_response(index_page, request.headers, request.method)
 
     @app.get("/favicon.ico")
     def favicon() -> Response:
@@ -91,17 +215,32 @@ def create_app() -> FastAPI:
         return Response(status_code=204)
 
     @app.get("/api/health")
-    def health() -> dict:
+    async def health() -> dict:
         return {"ok": True}
 
+    @app.get("/api/metrics", response_class=PlainTextResponse)
+    async def metrics() -> PlainTextResponse:
+        # Prometheus text format; see nightwatch.telemetry for what is recorded.
+        return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+    @app.get("/api/backup/status", response_model=BackupStatusOut)
+    async def backup_status() -> dict:
+        return backup_progress()
+
     @app.get("/api/shift/current", response_model=ShiftOut | None)
-    def shift_current(db: Session = Depends(get_db)) -> ShiftOut | None:
-        s = get_active_shift(db)
-        return _shift_out(s) if s else None
+    async def shift_current(request: Request, db: AsyncSession = Depends(get_async_db)) -> Response:
+        # Tag is taken before reading, so a concurrent write can only make it stale, never wrong.
+        tag = dataversion.etag(get_settings().db_path, "shift")
+        if _etag_matches(request, tag):
+            return Response(status_code=304, headers=_validator_headers(tag))
+        # Lean read: column tuples encoded straight to JSON; response_model only documents the shape.
+        row = await active_shift_row(db)
+        body = jsonenc.dumps(dict(zip(SHIFT_FIELDS, row)) if row else None)
+        return Response(body, media_type="application/json", headers=_validator_headers(tag))
 
     @app.post("/api/shift/start", response_model=ShiftStartOut)
-    def shift_start(db: Session = Depends(get_db)) -> ShiftStartOut:
-        new_shift, carried_count, already_active = start_shift(db)
+    async def shift_start(db: AsyncSession = Depends(get_async_db)) -> ShiftStartOut:
+        new_shift, carried_count, already_active = await start_shift(db)
         return ShiftStartOut(
             shift=_shift_out(new_shift),
             carried_task_count=carried_count,
@@ -109,53 +248,215 @@ def create_app() -> FastAPI:
         )
 
     @app.post("/api/shift/end", response_model=ShiftOut)
-    def shift_end(db: Session = Depends(get_db)) -> ShiftOut:
-        ended = end_shift(db)
+    async def shift_end(db: AsyncSession = Depends(get_async_db)) -> ShiftOut:
+        ended = await end_shift(db)
         if not ended:
             raise HTTPException(status_code=409, detail="No active shift.")
         return _shift_out(ended)
 
     @app.put("/api/shift/{shift_id}/notes", response_model=ShiftOut)
-    def shift_notes(shift_id: int, payload: ShiftNotesIn, db: Session = Depends(get_db)) -> ShiftOut:
-        s = set_shift_notes(db, shift_id, payload.notes)
+    async def shift_notes(
+        shift_id: int, payload: ShiftNotesIn, db: AsyncSession = Depends(get_async_db)
+    ) -> ShiftOut:
+        s = await set_shift_notes(db, shift_id, payload.notes)
         if not s:
             raise HTTPException(status_code=404, detail="Shift not found.")
         return _shift_out(s)
 
+    @app.get("/api/shifts", response_model=ShiftPageOut)
+    async def shifts_page(
+        cursor: int | None = None,
+        limit: int = Query(50, ge=1, le=200),
+        db: AsyncSession = Depends(get_async_db),
+    ) -> ShiftPageOut:
+        # Newest first; pass `next_cursor` back as `cursor` for the next page.
+        items, next_cursor = await list_shifts(db, cursor, limit)
+        return ShiftPageOut(items=[_shift_out(s) for s in items], next_cursor=next_cursor)
+
+    @app.get("/api/shifts/{shift_id}/tasks", response_model=TaskPageOut)
+    async def shift_tasks_page(
+        shift_id: int,
+        cursor: int | None = None,
+        limit: int = Query(100, ge=1, le=500),
+        db: AsyncSession = Depends(get_async_db),
+    ) -> TaskPageOut:
+        if cursor is None and not await get_shift(db, shift_id):
+            raise HTTPException(status_code=404, detail="Shift not found.")
+        items, next_cursor = await list_tasks_for_shift(db, shift_id, cursor, limit)
+        return TaskPageOut(items=[_task_out(t) for t in items], next_cursor=next_cursor)
+
+    @app.get("/api/search", response_model=SearchOut)
+    async def search_route(
+        q: str = Query(min_length=1, max_length=500),
+        limit: int = Query(20, ge=1, le=100),
+        offset: int = Query(0, ge=0),
+        db: AsyncSession = Depends(get_async_db),
+    ) -> SearchOut:
+        items, next_offset = await search(db, q, limit, offset)
+        return SearchOut(items=items, next_offset=next_offset)
+
     @app.get("/api/tasks/current", response_model=list[TaskOut])
-    def tasks_current(db: Session = Depends(get_db)) -> list[TaskOut]:
-        tasks = list_tasks_for_active_shift(db)
-        return [_task_out(t) for t in tasks]
+    async def tasks_current(request: Request, db: AsyncSession = Depends(get_async_db)) -> Response:
+        tag = dataversion.etag(get_settings().db_path, "tasks")
+        if _etag_matches(request, tag):
+            return Response(status_code=304, headers=_validator_headers(tag))
+        body = jsonenc.dump_rows(TASK_FIELDS, await active_task_rows(db))
+        return Response(body, media_type="application/json", headers=_validator_headers(tag))
+
+    @app.get("/api/changes", response_model=ChangesOut)
+    async def changes(since: int | None = Query(None, ge=0), db: AsyncSession = Depends(get_async_db)) -> Response:
+        # Delta sync: rows touched after `since`; without it, just the current cursor (reset).
+        body = jsonenc.dumps(await changes_since(db, since))
+        return Response(body, media_type="application/json", headers={"Cache-Control": "no-store"})
 
     @app.post("/api/tasks", response_model=TaskOut)
-    def task_add(payload: TaskIn, db: Session = Depends(get_db)) -> TaskOut:
-        t = add_task(db, payload.title)
+    async def task_add(payload: TaskIn, db: AsyncSession = Depends(get_async_db)) -> TaskOut:
+        t = await add_task(db, payload.title)
         return _task_out(t)
 
+    @app.post("/api/tasks/batch", response_model=TaskBatchOut)
+    async def task_batch(payload: TaskBatchIn, db: AsyncSession = Depends(get_async_db)) -> TaskBatchOut:
+        created, completed, reopened, deleted = await apply_task_batch(
+            db, payload.create, payload.complete, payload.reopen, payload.delete
+        )
+        return TaskBatchOut(
+            created=[_task_out(t) for t in created],
+            completed=completed,
+            reopened=reopened,
+            deleted=deleted,
+        )
+
     @app.post("/api/tasks/{task_id}/complete", response_model=TaskOut)
-    def task_complete(task_id: int, db: Session = Depends(get_db)) -> TaskOut:
-        t = complete_task(db, task_id)
+    async def task_complete(task_id: int, db: AsyncSession = Depends(get_async_db)) -> TaskOut:
+        t = await complete_task(db, task_id)
         if not t:
             raise HTTPException(status_code=404, detail="Task not found.")
         return _task_out(t)
 
     @app.post("/api/tasks/{task_id}/reopen", response_model=TaskOut)
-    def task_reopen(task_id: int, db: Session = Depends(get_db)) -> TaskOut:
-        t = reopen_task(db, task_id)
+    async def task_reopen(task_id: int, db: AsyncSession = Depends(get_async_db)) -> TaskOut:
+        t = await reopen_task(db, task_id)
         if not t:
             raise HTTPException(status_code=404, detail="Task not found.")
         return _task_out(t)
 
     @app.delete("/api/tasks/{task_id}")
-    def task_delete(task_id: int, db: Session = Depends(get_db)) -> dict:
-        ok = delete_task(db, task_id)
+    async def task_delete(task_id: int, db: AsyncSession = Depends(get_async_db)) -> dict:
+        ok = await delete_task(db, task_id)
         if not ok:
             raise HTTPException(status_code=404, detail="Task not found.")
         return {"ok": True}
 
+    @app.post("/api/ingest", response_model=IngestOut)
+    async def ingest(request: Request) -> IngestOut:
+        # Batches from `nightwatch agent`; kept in memory only (see nightwatch.hosts).
+        token = get_settings().ingest_token
+        if token and not hmac.compare_digest(request.headers.get("authorization", ""), f"Bearer {token}"):
+            raise HTTPException(status_code=401, detail="Bad ingest token.")
+        raw = await _read_capped(request, INGEST_MAX_BYTES)
+        if request.headers.get("content-encoding", "").lower() == "gzip":
+            try:
+                inflater = zlib.decompressobj(wbits=31)
+                raw = inflater.decompress(raw, INGEST_MAX_BYTES + 1)
+            except zlib.error:
+                raise HTTPException(status_code=400, detail="Bad gzip body.")
+        if len(raw) > INGEST_MAX_BYTES:
+            raise HTTPException(status_code=413, detail="Batch too large.")
+        try:
+            batch = IngestIn.model_validate_json(raw)
+        except ValidationError as e:
+            raise RequestValidationError(e.errors(include_url=False, include_context=False))
+        stored = request.app.state.hosts.ingest(batch.host, [s.model_dump() for s in batch.samples])
+        return IngestOut(stored=stored)
+
+    @app.get("/api/hosts", response_model=list[HostOut])
+    async def hosts(request: Request) -> list[dict]:
+        return request.app.state.hosts.hosts()
+
     @app.get("/api/system", response_model=SystemOut)
-    def system() -> dict:
-        return read_system_snapshot()
+    async def system(request: Request, host: str | None = None) -> dict:
+        if host is not None:
+            snap = request.app.state.hosts.latest(host)
+            if snap is None:
+                raise HTTPException(status_code=404, detail="Unknown host.")
+            return snap
+        # Served from the background sampler; only samples inline before the first tick.
+        sampler: SystemSampler = request.app.state.sampler
+        snap = sampler.latest()
+        if snap is None:
+            snap = await run_in_threadpool(sampler.sample)
+        return snap
+
+    @app.get("/api/collectors", response_model=list[CollectorOut])
+    async def collectors(request: Request) -> list[dict]:
+        # Cadence, cost and failures per sampler collector.
+        return request.app.state.sampler.scheduler.stats()
+
+    @app.get("/api/processes", response_model=ProcessesOut)
+    async def processes(
+        request: Request, limit: int = Query(10, ge=1, le=100), sort: Literal["cpu", "rss"] = "cpu"
+    ) -> dict:
+        # Rescanned by the sampler (the "processes" collector); this only picks the top rows.
+        monitor: ProcessMonitor = request.app.state.processes
+        top = monitor.top(limit, sort)
+        if top is None:
+            await run_in_threadpool(monitor.scan)
+            top = monitor.top(limit, sort)
+        return top
+
+    @app.get("/api/events")
+    async def events(request: Request) -> StreamingResponse:
+        # Server-sent events: "system" samples plus "shift"/"tasks" change notices.
+        async def stream():
+            q = hub.subscribe()
+            try:
+                yield b"retry: 3000\n\n"
+                snap = request.app.state.sampler.latest()
+                if snap is not None:
+                    yield sse_frame("system", SystemOut(**snap).model_dump(mode="json"))
+                while True:
+                    try:
+                        frame = await asyncio.wait_for(q.get(), timeout=15.0)
+                    except asyncio.TimeoutError:
+                        # Keep proxies from closing an idle stream.
+                        yield b": ping\n\n"
+                        continue
+                    if frame is None:
+                        return
+                    yield frame
+            finally:
+                hub.unsubscribe(q)
+
+        return StreamingResponse(
+            stream(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    @app.get("/api/system/history", response_model=SystemHistoryOut)
+    def system_history(
+        request: Request,
+        host: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        resolution: Literal["raw", "m1", "m15"] | None = None,
+    ) -> SystemHistoryOut:
+        # Defaults to the last 12 hours (one overnight shift).
+        until = until or datetime.now(timezone.utc)
+        since = since or (until - timedelta(hours=12))
+        if until.tzinfo is None:
+            until = until.replace(tzinfo=timezone.utc)
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        if host is not None:
+            # Remote hosts only have the raw samples held in memory.
+            points = request.app.state.hosts.history(host, since, until)
+            if points is None:
+                raise HTTPException(status_code=404, detail="Unknown host.")
+            return SystemHistoryOut(resolution="raw", points=points)
+        store: MetricsStore = request.app.state.metrics
+        res, points = store.query(since, until, resolution)
+        return SystemHistoryOut(resolution=res, points=points)
 
     return app
 
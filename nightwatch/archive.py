@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+# Hot/cold split. Closed shifts older than `archive_after_days` move, together
+# with their tasks, out of the live database into one SQLite file per month of
+# shift start under `archive_dir`. The live database keeps an `archives` table
+# of the shift id range each file holds; history reads ATTACH a file only when
+# a request reaches past what is still live.
+
+import sqlite3
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from nightwatch.config import Settings, get_settings
+
+# Schema name archive files are attached under.
+ALIAS = "nw_archive"
+# Makes ORM queries on Shift/Task read the attached archive's tables.
+SCHEMA_MAP = {None: ALIAS}
+
+# Shifts moved per transaction, and the pause between transactions so the
+# server's writes get the lock in between.
+ARCHIVE_CHUNK = 200
+ARCHIVE_PAUSE_S = 0.005
+
+# Same tables as the live database. Archived rows are never edited, so the
+# search index only needs the insert triggers.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS shifts (
+  id INTEGER PRIMARY KEY,
+  started_at TEXT NOT NULL,
+  ended_at TEXT NULL,
+  notes TEXT NOT NULL DEFAULT '',
+  created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tasks (
+  id INTEGER PRIMARY KEY,
+  title TEXT NOT NULL,
+  created_at TEXT NOT NULL,
+  completed_at TEXT NULL,
+  shift_id INTEGER NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_shift_id_id ON tasks(shift_id, id);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+  title, content='tasks', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS shifts_fts USING fts5(
+  notes, content='shifts', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS tasks_fts_ai AFTER INSERT ON tasks BEGIN
+  INSERT INTO tasks_fts(rowid, title) VALUES (new.id, new.title);
+END;
+CREATE TRIGGER IF NOT EXISTS shifts_fts_ai AFTER INSERT ON shifts BEGIN
+  INSERT INTO shifts_fts(rowid, notes) VALUES (new.id, new.notes);
+END;
+"""
+
+# Closed before the cutoff and nothing left open (open tasks are carried into
+# the next shift, so they must stay live).
+_CANDIDATES = """
+SELECT s.id, substr(s.started_at, 1, 7)
+  FROM shifts s
+ WHERE s.ended_at IS NOT NULL AND s.ended_at < ?
+   AND NOT EXISTS (SELECT 1 FROM tasks t WHERE t.shift_id = s.id AND t.completed_at IS NULL)
+ ORDER BY s.id
+"""
+
+_RECORD = """
+INSERT INTO archives(period, min_shift_id, max_shift_id, shifts, tasks) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT(period) DO UPDATE SET
+  min_shift_id = min(min_shift_id, excluded.min_shift_id),
+  max_shift_id = max(max_shift_id, excluded.max_shift_id),
+  shifts = shifts + excluded.shifts,
+  tasks = tasks + excluded.tasks,
+  updated_at = strftime('%Y-%m-%d %H:%M:%f','now')
+"""
+
+
+def archive_path(archive_dir: Path, period: str) -> Path:
+    return archive_dir / f"nightwatch-archive-{period}.db"
+
+
+def _ensure_archive(path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path)
+    try:
+        conn.executescript(_SCHEMA)
+    finally:
+        conn.close()
+
+
+def _move_chunk(conn: sqlite3.Connection, period: str, ids: list[int]) -> tuple[int, int]:
+    marks = ",".join("?" * len(ids))
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Re-check under the write lock: a task may have been reopened since the scan.
+        ids = [
+            r[0]
+            for r in conn.execute(
+                f"SELECT id FROM main.shifts s WHERE id IN ({marks}) AND NOT EXISTS"
+                " (SELECT 1 FROM main.tasks t WHERE t.shift_id = s.id AND t.completed_at IS NULL)",
+                ids,
+            )
+        ]
+        if not ids:
+            conn.execute("ROLLBACK")
+            return 0, 0
+        marks = ",".join("?" * len(ids))
+        # OR IGNORE: a crash between the two files' commits (WAL) can leave
+        # rows copied but not yet deleted; the rerun then just deletes them.
+        conn.execute(
+            f"INSERT OR IGNORE INTO {ALIAS}.shifts(id, started_at, ended_at, notes, created_at)"
+            f" SELECT id, started_at, ended_at, notes, created_at FROM main.shifts WHERE id IN ({marks})",
+            ids,
+        )
+        conn.execute(
+            f"INSERT OR IGNORE INTO {ALIAS}.tasks(id, title, created_at, completed_at, shift_id)"
+            f" SELECT id, title, created_at, completed_at, shift_id FROM main.tasks WHERE shift_id IN ({marks})",
+            ids,
+        )
+        # The live FTS delete triggers drop the moved rows from the live index.
+        tasks = conn.execute(f"DELETE FROM main.tasks WHERE shift_id IN ({marks})", ids).rowcount
+        conn.execute(f"DELETE FROM main.shifts WHERE id IN ({marks})", ids)
+        conn.execute(_RECORD, (period, min(ids), max(ids), len(ids), tasks))
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    return len(ids), tasks
+
+
+def archive_closed_shifts(
+    db_path: Path, archive_dir: Path, older_than_days: float, now: datetime | None = None
+) -> list[tuple[str, int, int]]:
+    """
+    Move closed shifts that ended more than `older_than_days` ago, with their
+    tasks, into per-month archive files. Shifts that still have open tasks
+    stay live. Returns (period, shifts, tasks) per archive file written.
+    """
+    cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=older_than_days)
+    # Same text form SQLAlchemy stores (UTC, no offset), so the comparison is a string compare.
+    cutoff_s = cutoff.astimezone(timezone.utc).strftime("%Y-%m-%d %H:%M:%S.%f")
+    conn = sqlite3.connect(db_path, timeout=30.0, isolation_level=None)
+    try:
+        by_period: dict[str, list[int]] = {}
+        for shift_id, period in conn.execute(_CANDIDATES, (cutoff_s,)).fetchall():
+            by_period.setdefault(period, []).append(shift_id)
+        moved: list[tuple[str, int, int]] = []
+        for period, ids in by_period.items():
+            path = archive_path(archive_dir, period)
+            _ensure_archive(path)
+            conn.execute(f"ATTACH DATABASE ? AS {ALIAS}", (str(path),))
+            try:
+                shifts = tasks = 0
+                for i in range(0, len(ids), ARCHIVE_CHUNK):
+                    s, t = _move_chunk(conn, period, ids[i : i + ARCHIVE_CHUNK])
+                    shifts += s
+                    tasks += t
+                    time.sleep(ARCHIVE_PAUSE_S)
+            finally:
+                conn.execute(f"DETACH DATABASE {ALIAS}")
+            if shifts:
+                moved.append((period, shifts, tasks))
+        return moved
+    finally:
+        conn.close()
+
+
+def run_scheduled_archive(settings: Settings) -> list[tuple[str, int, int]]:
+    """One tick of the server's archive job (no-op unless `archive_after_days` is set)."""
+    if settings.archive_after_days <= 0:
+        return []
+    return archive_closed_shifts(settings.db_path, settings.archive_dir, settings.archive_after_days)
+
+
+# --- reads (services) ---
+
+
+def periods(db: Session, below: int | None = None) -> list[tuple[str, int]]:
+    """(period, max shift id) of archives holding ids below `below`, newest first."""
+    q = "SELECT period, max_shift_id FROM archives"
+    params: dict = {}
+    if below is not None:
+        q += " WHERE min_shift_id < :below"
+        params["below"] = below
+    rows = db.execute(text(q + " ORDER BY max_shift_id DESC"), params).all()
+    archive_dir = get_settings().archive_dir
+    # A removed file just drops out of history instead of failing the read.
+    return [(p, m) for p, m in rows if archive_path(archive_dir, p).exists()]
+
+
+def periods_holding(db: Session, shift_id: int) -> list[str]:
+    rows = db.execute(
+        text("SELECT period FROM archives WHERE :id BETWEEN min_shift_id AND max_shift_id"), {"id": shift_id}
+    ).scalars()
+    archive_dir = get_settings().archive_dir
+    return [p for p in rows if archive_path(archive_dir, p).exists()]
+
+
+@contextmanager
+def attached(db: Session, period: str) -> Iterator[None]:
+    """Attach one archive file to the session's connection as `ALIAS` for the block."""
+    path = archive_path(get_settings().archive_dir, period)
+    db.execute(text(f"ATTACH DATABASE :path AS {ALIAS}"), {"path": str(path)})
+    try:
+        yield
+    finally:
+        db.execute(text(f"DETACH DATABASE {ALIAS}"))
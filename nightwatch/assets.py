@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+# Static assets, built once at startup: every file under static/ is kept in
+# memory with gzip (and brotli, when installed) variants, and also served
+# under a content-hashed name ("app.3f9c0e12ab.js") that index.html is
+# rewritten to use. Hashed names never change content, so browsers cache
+# them for a year without revalidating; index.html itself revalidates with
+# an ETag, so a repeat load costs one 304.
+
+import gzip
+import hashlib
+import mimetypes
+from dataclasses import dataclass
+from pathlib import Path
+
+from starlette.responses import Response
+
+try:
+    import brotli
+except ModuleNotFoundError:  # optional
+    brotli = None
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+# Not worth compressing below this.
+_MIN_COMPRESS_BYTES = 256
+
+# Preferred first when the client accepts several.
+_ENCODINGS = ("br", "gzip")
+
+
+# ETag suffix per encoding: a strong validator names one representation.
+_ETAG_SUFFIX = {"identity": "", "gzip": "-gz", "br": "-br"}
+
+
+@dataclass(frozen=True)
+class Asset:
+    media_type: str
+    # content digest; see etag()
+    digest: str
+    cache_control: str
+    # encoding ("identity", "gzip", "br") -> body
+    bodies: dict[str, bytes]
+
+    def etag(self, encoding: str) -> str:
+        return f'"{self.digest}{_ETAG_SUFFIX[encoding]}"'
+
+
+def _variants(data: bytes) -> dict[str, bytes]:
+    bodies = {"identity": data}
+    if len(data) < _MIN_COMPRESS_BYTES:
+        return bodies
+    compressed = {"gzip": gzip.compress(data, 9, mtime=0)}
+    if brotli is not None:
+        compressed["br"] = brotli.compress(data, quality=11)
+    # Only keep variants that actually save bytes.
+    bodies.update((enc, body) for enc, body in compressed.items() if len(body) < len(data))
+    return bodies
+
+
+def _asset(name: str, data: bytes, digest: str, cache_control: str) -> Asset:
+    media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+    if media_type.startswith("text/") or media_type == "application/javascript":
+        media_type += "; charset=utf-8"
+    return Asset(media_type=media_type, digest=digest, cache_control=cache_control, bodies=_variants(data))
+
+
+def _fingerprinted(name: str, digest: str) -> str:
+    stem, dot, suffix = name.rpartition(".")
+    return f"{stem}.{digest}.{suffix}" if dot else f"{name}.{digest}"
+
+
+def build_assets(static_dir: Path, prefix: str = "/static/") -> tuple[Asset, dict[str, Asset]]:
+    """
+    Returns (index page, {name under `prefix`: asset}). Each file is available
+    under its hashed name (immutable) and its plain name (revalidated, for
+    anything still linking to it).
+    """
+    files: dict[str, Asset] = {}
+    index_html = ""
+    renames: dict[str, str] = {}
+    for p in sorted(static_dir.iterdir()):
+        if not p.is_file():
+            continue
+        data = p.read_bytes()
+        digest = hashlib.blake2b(data, digest_size=5).hexdigest()
+        if p.name == "index.html":
+            index_html = data.decode("utf-8")
+            continue
+        hashed = _fingerprinted(p.name, digest)
+        renames[prefix + p.name] = prefix + hashed
+        files[hashed] = _asset(p.name, data, digest, IMMUTABLE)
+        files[p.name] = _asset(p.name, data, digest, REVALIDATE)
+    for plain, hashed in renames.items():
+        index_html = index_html.replace(f'"{plain}"', f'"{hashed}"')
+    body = index_html.encode("utf-8")
+    index = _asset("index.html", body, hashlib.blake2b(body, digest_size=5).hexdigest(), REVALIDATE)
+    return index, files
+
+
+def _accepted(header: str) -> set[str]:
+    accepted: set[str] = set()
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+def asset_response(asset: Asset, headers, method: str = "GET") -> Response:
+    """Pick the smallest acceptable encoding; 304 when the client's copy is current."""
+    accepted = _accepted(headers.get("accept-encoding", ""))
+    encoding = "identity"
+    for enc in _ENCODINGS:
+        if enc in asset.bodies and (enc in accepted or "*" in accepted):
+            encoding = enc
+            break
+    out = {"ETag": asset.etag(encoding), "Cache-Control": asset.cache_control, "Vary": "Accept-Encoding"}
+    inm = headers.get("if-none-match")
+    if inm:
+        # Any encoding's tag means the client holds the current content.
+        current = {asset.etag(enc) for enc in asset.bodies}
+        if inm.strip() == "*" or current.intersection(t.strip().removeprefix("W/") for t in inm.split(",")):
+            return Response(status_code=304, headers=out)
+    if encoding != "identity":
+        out["Content-Encoding"] = encoding
+    body = asset.bodies[encoding]
+    if method == "HEAD":
+        out["Content-Length"] = str(len(body))
+        body = b""
+    return Response(body, media_type=asset.media_type, headers=out)
+
+
+class AssetFiles:
+    """ASGI app serving a prebuilt asset map (mounted in place of StaticFiles)."""
+
+    def __init__(self, files: dict[str, Asset]) -> None:
+        self.files = files
+
+    async def __call__(self, scope, receive, send) -> None:
+        path = scope["path"]
+        root = scope.get("root_path", "")
+        if root and path.startswith(root):
+            path = path[len(root) :]
+        asset = self.files.get(path.lstrip("/"))
+        if scope["method"] not in ("GET", "HEAD"):
+            response = Response(status_code=405, headers={"Allow": "GET, HEAD"})
+        elif asset is None:
+            response = Response("Not Found", status_code=404, media_type="text/plain")
+        else:
+            headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope["headers"]}
+            response = asset_response(asset, headers, scope["method"])
+        await response(scope, receive, send)
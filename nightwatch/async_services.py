@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+# Async counterparts of `nightwatch.services` for the web app.
+# Each one runs the sync implementation through `AsyncSession.run_sync`, so the
+# logic lives in one place while all I/O goes through the async driver.
+
+from collections.abc import Callable, Sequence
+from typing import Any
+
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from nightwatch import services
+from nightwatch.models import Shift, Task
+from nightwatch.writer import WriteQueue
+
+# When group commit is on, mutations go to the single writer instead of the
+# request's own session.
+_writer: WriteQueue | None = None
+
+
+def use_writer(writer: WriteQueue | None) -> None:
+    global _writer
+    _writer = writer
+
+
+async def _write(db: AsyncSession, fn: Callable[..., Any], *args: Any) -> Any:
+    if _writer is not None:
+        return await _writer.run(fn, *args)
+    return await db.run_sync(fn, *args)
+
+
+async def start_shift(db: AsyncSession) -> tuple[Shift, int, bool]:
+    return await _write(db, services.start_shift)
+
+
+async def end_shift(db: AsyncSession) -> Shift | None:
+    return await _write(db, services.end_shift)
+
+
+async def set_shift_notes(db: AsyncSession, shift_id: int, notes: str) -> Shift | None:
+    return await _write(db, services.set_shift_notes, shift_id, notes)
+
+
+async def active_shift_row(db: AsyncSession) -> Row | None:
+    return await db.run_sync(services.active_shift_row)
+
+
+async def active_task_rows(db: AsyncSession) -> Sequence[Row]:
+    return await db.run_sync(services.active_task_rows)
+
+
+async def changes_since(db: AsyncSession, since: int | None) -> dict:
+    return await db.run_sync(services.changes_since, since)
+
+
+async def prune_change_log(db: AsyncSession) -> int:
+    return await _write(db, services.prune_change_log)
+
+
+async def get_shift(db: AsyncSession, shift_id: int) -> Shift | None:
+    return await db.run_sync(services.get_shift, shift_id)
+
+
+async def list_shifts(db: AsyncSession, cursor: int | None, limit: int) -> tuple[list[Shift], int | None]:
+    return await db.run_sync(services.list_shifts, cursor, limit)
+
+
+async def list_tasks_for_shift(
+    db: AsyncSession, shift_id: int, cursor: int | None, limit: int
+) -> tuple[list[Task], int | None]:
+    return await db.run_sync(services.list_tasks_for_shift, shift_id, cursor, limit)
+
+
+async def search(db: AsyncSession, query: str, limit: int, offset: int = 0) -> tuple[list[dict], int | None]:
+    return await db.run_sync(services.search, query, limit, offset)
+
+
+async def add_task(db: AsyncSession, title: str) -> Task:
+    return await _write(db, services.add_task, title)
+
+
+async def complete_task(db: AsyncSession, task_id: int) -> Task | None:
+    return await _write(db, services.complete_task, task_id)
+
+
+async def reopen_task(db: AsyncSession, task_id: int) -> Task | None:
+    return await _write(db, services.reopen_task, task_id)
+
+
+async def delete_task(db: AsyncSession, task_id: int) -> bool:
+    return await _write(db, services.delete_task, task_id)
+
+
+async def add_tasks(db: AsyncSession, titles: list[str], done: list[bool] | None = None) -> list[Task]:
+    return await _write(db, services.add_tasks, titles, done)
+
+
+async def apply_task_batch(
+    db: AsyncSession,
+    create: list[str],
+    complete: list[int],
+    reopen: list[int],
+    delete_ids: list[int],
+) -> tuple[list[Task], int, int, int]:
+    return await _write(db, services.apply_task_batch, create, complete, reopen, delete_ids)
@@ -1,33 +1,204 @@
 from __future__ import annotations
 
+import os
+import re
+import shutil
 import sqlite3
-from datetime import date
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, timedelta, timezone
 from pathlib import Path
 
+from nightwatch import incremental_backup
+from nightwatch.config import Settings
+from nightwatch.telemetry import registry
+
+# Pages copied per step (4 KiB pages -> ~1 MiB), and the pause between steps
+# so readers and writers get the database in between.
+BACKUP_STEP_PAGES = 256
+BACKUP_STEP_PAUSE_S = 0.005
+
+
+@dataclass
+class BackupProgress:
+    running: bool = False
+    path: str | None = None
+    pages_total: int = 0
+    pages_done: int = 0
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    error: str | None = None
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+_progress = BackupProgress()
+_lock = threading.Lock()
+
+
+def backup_progress() -> dict:
+    """Snapshot of the current (or last) backup run."""
+    return _progress.as_dict()
+
 
 def _backup_filename(today: date) -> str:
     return f"nightwatch-{today.isoformat()}.db"
 
 
+def _on_step(status: int, remaining: int, total: int) -> None:
+    _progress.pages_total = total
+    _progress.pages_done = total - remaining
+    if remaining:
+        time.sleep(BACKUP_STEP_PAUSE_S)
+
+
 def ensure_daily_backup(db_path: Path, backups_dir: Path) -> Path | None:
     """
     Create one SQLite backup per day.
-    Returns the backup path if created, else None.
+    Returns the backup path if created, else None (already done today, or
+    another backup is in progress).
+
+    Copies in page chunks with a short pause between them, into a temporary
+    file that is renamed into place only once complete. Blocking; run it off
+    the event loop.
     """
+    global _progress
     backups_dir.mkdir(parents=True, exist_ok=True)
     out = backups_dir / _backup_filename(date.today())
     if out.exists():
         return None
+    if not _lock.acquire(blocking=False):
+        return None
+    try:
+        if out.exists():
+            return None
+        tmp = out.with_name(out.name + ".part")
+        tmp.unlink(missing_ok=True)  # leftover from an interrupted run
+        _progress = BackupProgress(running=True, path=str(out), started_at=datetime.now(timezone.utc))
+        t0 = time.perf_counter()
+        try:
+            src = sqlite3.connect(db_path)
+            try:
+                dst = sqlite3.connect(tmp)
+                try:
+                    src.backup(dst, pages=BACKUP_STEP_PAGES, progress=_on_step)
+                    dst.commit()
+                finally:
+                    dst.close()
+            finally:
+                src.close()
+            os.replace(tmp, out)
+            registry.observe("nightwatch_backup_duration_seconds", time.perf_counter() - t0, "daily")
+        except Exception as e:
+            _progress.error = str(e)
+            tmp.unlink(missing_ok=True)
+            raise
+        finally:
+            _progress.running = False
+            _progress.finished_at = datetime.now(timezone.utc)
+        return out
+    finally:
+        _lock.release()
 
-    src = sqlite3.connect(db_path)
+
+def _on_read(done: int, total: int) -> None:
+    _progress.pages_total = total
+    _progress.pages_done = done
+
+
+def ensure_incremental_backup(
+    db_path: Path, backups_dir: Path, interval: timedelta, base_every: timedelta
+) -> Path | None:
+    """Incremental mode: base snapshot or changed-page delta when one is due (see nightwatch.incremental_backup)."""
+    global _progress
+    if not _lock.acquire(blocking=False):
+        return None
     try:
-        dst = sqlite3.connect(out)
+        _progress = BackupProgress(running=True, path=str(backups_dir), started_at=datetime.now(timezone.utc))
+        t0 = time.perf_counter()
         try:
-            src.backup(dst)
-            dst.commit()
+            out = incremental_backup.ensure_incremental_backup(
+                db_path, backups_dir, interval, base_every, progress=_on_read
+            )
+            _progress.path = str(out) if out else None
+            if out:
+                kind = "base" if out.name == "base.db.gz" else "delta"
+                registry.observe("nightwatch_backup_duration_seconds", time.perf_counter() - t0, kind)
+            return out
+        except Exception as e:
+            _progress.error = str(e)
+            raise
         finally:
-            dst.close()
+            _progress.running = False
+            _progress.finished_at = datetime.now(timezone.utc)
     finally:
-        src.close()
+        _lock.release()
+
+
+_DAILY_RE = re.compile(r"^nightwatch-(\d{4}-\d{2}-\d{2})\.db$")
+
+
+def _daily_backups(backups_dir: Path) -> list[tuple[date, Path]]:
+    out = []
+    for p in backups_dir.glob("nightwatch-*.db"):
+        m = _DAILY_RE.match(p.name)
+        if m:
+            out.append((date.fromisoformat(m.group(1)), p))
+    out.sort()
     return out
 
+
+def prune_backups(backups_dir: Path, retention_days: float) -> list[Path]:
+    """Delete daily copies and incremental chains older than the retention window. Always keeps the newest."""
+    if retention_days <= 0 or not backups_dir.exists():
+        return []
+    cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+    removed = []
+    for day, p in _daily_backups(backups_dir)[:-1]:
+        if day < cutoff.date():
+            p.unlink(missing_ok=True)
+            removed.append(p)
+    removed += incremental_backup.prune_chains(backups_dir, cutoff)
+    return removed
+
+
+def run_scheduled_backup(settings: Settings) -> Path | None:
+    """One tick of the server's backup loop: back up per `backup_mode`, then apply retention."""
+    if settings.backup_mode == "incremental":
+        out = ensure_incremental_backup(
+            settings.db_path,
+            settings.backups_dir,
+            timedelta(hours=settings.backup_interval_hours),
+            timedelta(days=settings.backup_base_days),
+        )
+    else:
+        out = ensure_daily_backup(settings.db_path, settings.backups_dir)
+    prune_backups(settings.backups_dir, settings.backup_retention_days)
+    return out
+
+
+def restore_backup(backups_dir: Path, at: datetime, out: Path) -> tuple[datetime, Path]:
+    """
+    Rebuild the database as of `at` into `out` from the newest restore point at
+    or before it: an incremental base+deltas, or a daily copy.
+    Returns (restore point time, source path).
+    """
+    best: tuple[datetime, Path] | None = None
+    points = [p for p in incremental_backup.restore_points(backups_dir) if p.at <= at]
+    if points:
+        best = (points[-1].at, points[-1].path)
+    for _, p in _daily_backups(backups_dir):
+        mtime = datetime.fromtimestamp(p.stat().st_mtime, timezone.utc)
+        if mtime <= at and (best is None or mtime > best[0]):
+            best = (mtime, p)
+    if best is None:
+        raise LookupError(f"no backup at or before {at.isoformat()}")
+    if best[1].name.startswith("nightwatch-"):
+        tmp = out.with_name(out.name + ".part")
+        shutil.copyfile(best[1], tmp)
+        os.replace(tmp, out)
+        return best
+    point = incremental_backup.restore(backups_dir, best[0], out)
+    return point.at, point.path
@@ -1,36 +1,75 @@
 from __future__ import annotations
 
 import argparse
+import re
 import sys
+from collections.abc import Iterable, Iterator
+from contextlib import closing, nullcontext
+from datetime import datetime, timezone
+from pathlib import Path
 
-import uvicorn
-
-from nightwatch.app import create_app
-from nightwatch.config import get_settings
-from nightwatch.db import SessionLocal, init_db
-from nightwatch.services import end_shift, get_active_shift, list_tasks_for_active_shift, start_shift
-from nightwatch.system_watch import read_system_snapshot
+# Keep module-level imports to the stdlib: every subcommand imports only what it
+# needs, so `status`/`tasks` from a shell prompt or cron never load the web stack.
+# benchmarks/import_time.py guards this.
 
 
 def _print(s: str = "") -> None:
     sys.stdout.write(s + "\n")
 
 
-def cmd_status(_: argparse.Namespace) -> int:
+def _remote(cmd: str) -> dict | None:
+    """Run `cmd` on the running server over its control socket; None if no server is listening."""
+    from nightwatch import control
+    from nightwatch.config import get_settings
+
+    try:
+        return control.request(get_settings().control_socket, cmd)
+    except (control.ControlError, OSError) as e:
+        sys.stderr.write(f"error: server: {e}\n")
+        raise SystemExit(1)
+
+
+def _local_status() -> tuple[tuple[int, str] | None, int, int]:
+    from nightwatch import quickread
+    from nightwatch.config import get_settings
+
+    conn = quickread.open_if_current(get_settings().db_path)
+    if conn is not None:
+        with closing(conn):
+            s = quickread.active_shift(conn)
+            total, done = quickread.task_counts(conn, s[0]) if s else (0, 0)
+        return ((s[0], s[1].isoformat()) if s else None), total, done
+
+    from nightwatch.db import SessionLocal, init_db
+    from nightwatch.services import get_active_shift, list_tasks_for_active_shift
+
     init_db()
     with SessionLocal() as db:
-        s = get_active_shift(db)
+        active = get_active_shift(db)
         tasks = list_tasks_for_active_shift(db)
+    s = (active.id, active.started_at.isoformat()) if active else None
+    return s, len(tasks), sum(1 for t in tasks if t.completed_at is not None)
 
-    sysinfo = read_system_snapshot()
+
+def cmd_status(_: argparse.Namespace) -> int:
+    remote = _remote("status")
+    if remote is not None:
+        shift = remote["shift"]
+        s = (shift["id"], shift["started_at"]) if shift else None
+        total, done = remote["tasks"]["total"], remote["tasks"]["done"]
+        sysinfo = remote["system"]
+    else:
+        s, total, done = _local_status()
+        from nightwatch.system_watch import SystemSampler
+
+        sysinfo = SystemSampler().sample()
 
     if s:
-        _print(f"shift: active (id={s.id}) started_at={s.started_at.isoformat()}")
+        _print(f"shift: active (id={s[0]}) started_at={s[1]}")
     else:
         _print("shift: none")
 
-    done = sum(1 for t in tasks if t.completed_at is not None)
-    _print(f"tasks: {len(tasks)} total / {done} done")
+    _print(f"tasks: {total} total / {done} done")
     _print(
         "system: "
         f"cpu={sysinfo['cpu_percent']:.0f}% "
@@ -42,52 +81,297 @@ def cmd_status(_: argparse.Namespace) -> int:
 
 
 def cmd_serve(args: argparse.Namespace) -> int:
+    import uvicorn
+
+    from nightwatch.app import create_app
+    from nightwatch.config import get_settings
+
     s = get_settings()
     host = args.host or s.host
     port = args.port or s.port
-    uvicorn.run(create_app(), host=host, port=port, log_level="info")
+    config = uvicorn.Config(create_app(), host=host, port=port, log_level="info", timeout_graceful_shutdown=3)
+    uvicorn.Server(config).run()
+    return 0
+
+
+def cmd_agent(args: argparse.Namespace) -> int:
+    import socket
+    import threading
+
+    from nightwatch.agent import ingest_url, run_agent
+    from nightwatch.config import get_settings
+
+    host = args.host or socket.gethostname()
+    token = args.token if args.token is not None else get_settings().ingest_token
+    _print(f"pushing {host} to {ingest_url(args.push)} every {args.push_every:g}s (sampling every {args.interval:g}s)")
+    last_error = ""
+
+    def on_error(e: Exception) -> None:
+        # Once per distinct error, not every retry.
+        nonlocal last_error
+        if str(e) != last_error:
+            last_error = str(e)
+            sys.stderr.write(f"agent: {e}\n")
+
+    stop = threading.Event()
+    try:
+        intervals = dict(get_settings().collector_intervals)
+        run_agent(args.push, host, args.interval, args.push_every, token, stop, on_error, intervals)
+    except KeyboardInterrupt:
+        stop.set()
     return 0
 
 
 def cmd_start_shift(_: argparse.Namespace) -> int:
-    init_db()
-    with SessionLocal() as db:
-        s, carried, already = start_shift(db)
+    remote = _remote("start-shift")
+    if remote is not None:
+        shift_id, carried, already = remote["id"], remote["carried"], remote["already"]
+    else:
+        from nightwatch.db import SessionLocal, init_db
+        from nightwatch.services import start_shift
+
+        init_db()
+        with SessionLocal() as db:
+            s, carried, already = start_shift(db)
+        shift_id = s.id
     if already:
-        _print(f"shift already active: id={s.id}")
+        _print(f"shift already active: id={shift_id}")
     else:
-        _print(f"shift started: id={s.id} carried={carried}")
+        _print(f"shift started: id={shift_id} carried={carried}")
     return 0
 
 
 def cmd_end_shift(_: argparse.Namespace) -> int:
-    init_db()
-    with SessionLocal() as db:
-        s = end_shift(db)
-    if not s:
+    remote = _remote("end-shift")
+    if remote is not None:
+        shift_id, ended_at = remote["id"], remote.get("ended_at", "")
+    else:
+        from nightwatch.db import SessionLocal, init_db
+        from nightwatch.services import end_shift
+
+        init_db()
+        with SessionLocal() as db:
+            s = end_shift(db)
+        shift_id = s.id if s else None
+        ended_at = s.ended_at.isoformat() if s and s.ended_at else ""
+    if shift_id is None:
         _print("no active shift")
         return 1
-    _print(f"shift ended: id={s.id} ended_at={s.ended_at.isoformat() if s.ended_at else ''}")
+    _print(f"shift ended: id={shift_id} ended_at={ended_at}")
     return 0
 
 
-def cmd_tasks(_: argparse.Namespace) -> int:
+def _local_tasks() -> tuple[bool, list[tuple[int, str, bool]]]:
+    from nightwatch import quickread
+    from nightwatch.config import get_settings
+
+    conn = quickread.open_if_current(get_settings().db_path)
+    if conn is not None:
+        with closing(conn):
+            s = quickread.active_shift(conn)
+            return s is not None, quickread.tasks_oldest_first(conn, s[0]) if s else []
+
+    from nightwatch.db import SessionLocal, init_db
+    from nightwatch.services import get_active_shift, list_tasks_for_active_shift
+
     init_db()
     with SessionLocal() as db:
-        from nightwatch.services import get_active_shift
-
         s = get_active_shift(db)
-        tasks = list_tasks_for_active_shift(db)
-    if not s:
+        # oldest first for reading
+        tasks = [(t.id, t.title, t.completed_at is not None) for t in reversed(list_tasks_for_active_shift(db))]
+    return s is not None, tasks
+
+
+def cmd_tasks(_: argparse.Namespace) -> int:
+    remote = _remote("tasks")
+    if remote is not None:
+        active, tasks = remote["active"], remote["tasks"]
+    else:
+        active, tasks = _local_tasks()
+    if not active:
         _print("no active shift")
         return 1
     if not tasks:
         _print("no tasks")
         return 0
-    # oldest first for reading
-    for t in reversed(tasks):
-        mark = "x" if t.completed_at else " "
-        _print(f"[{mark}] {t.id} {t.title}")
+    for task_id, title, done in tasks:
+        mark = "x" if done else " "
+        _print(f"[{mark}] {task_id} {title}")
+    return 0
+
+
+def cmd_migrate(_: argparse.Namespace) -> int:
+    from nightwatch.config import get_settings
+    from nightwatch.migrate import apply_migrations
+
+    shown = False
+
+    def progress(m, done: int, total: int | None) -> None:
+        nonlocal shown
+        shown = True
+        of = f"/{total}" if total is not None else ""
+        sys.stdout.write(f"\r{m.path.name}: {done}{of} rows")
+        sys.stdout.flush()
+
+    applied = apply_migrations(get_settings().db_path, progress=progress)
+    if shown:
+        _print()
+    _print(f"migrations applied: {applied}")
+    return 0
+
+
+# "- [ ] title", "* title", "[x] title" -> "title"; group 1 is the check mark.
+_CHECKLIST_PREFIX = re.compile(r"^(?:[-*+]\s+)?(?:\[([ xX])\]\s+)?")
+
+# Bytes of titles per tasks-import request, under the control socket's line limit.
+_IMPORT_REQUEST_BYTES = 48 * 1024
+
+
+def _read_titles(lines: Iterable[str]) -> Iterator[tuple[str, bool]]:
+    """(title, done) per checklist line; "[x]" items are imported completed."""
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        m = _CHECKLIST_PREFIX.match(line)
+        title = line[m.end() :].strip()
+        if title:
+            yield title[:240], (m.group(1) or " ") in "xX"
+
+
+def _import_chunks(items: Iterable[tuple[str, bool]], size: int) -> Iterator[tuple[list[str], list[bool]]]:
+    titles: list[str] = []
+    done: list[bool] = []
+    used = 0
+    for title, d in items:
+        # Worst case as JSON (\uXXXX escapes) plus quotes and separators.
+        cost = len(title) * 6 + 10
+        if titles and (len(titles) >= size or used + cost > _IMPORT_REQUEST_BYTES):
+            yield titles, done
+            titles, done, used = [], [], 0
+        titles.append(title)
+        done.append(d)
+        used += cost
+    if titles:
+        yield titles, done
+
+
+def cmd_tasks_import(args: argparse.Namespace) -> int:
+    from nightwatch import control
+    from nightwatch.config import get_settings
+
+    total = 0
+    src = nullcontext(sys.stdin) if args.file == "-" else open(args.file, encoding="utf-8")
+    with src as f:
+        chunks = _import_chunks(_read_titles(f), max(1, args.chunk_size))
+        # While the server runs, it applies each chunk through its writer so
+        # open dashboards see the new tasks.
+        try:
+            client = control.connect(get_settings().control_socket)
+            if client is not None:
+                with client:
+                    for titles, done in chunks:
+                        total += client.call("tasks-import", {"titles": titles, "done": done})["imported"]
+        except (control.ControlError, OSError) as e:
+            sys.stderr.write(f"error: server: {e} (imported {total} before the error)\n")
+            return 1
+        if client is None:
+            total = _local_import(chunks)
+    _print(f"imported: {total}")
+    return 0
+
+
+def _local_import(chunks: Iterable[tuple[list[str], list[bool]]]) -> int:
+    from nightwatch.db import SessionLocal, init_db
+    from nightwatch.services import add_tasks
+
+    init_db(backup=False)
+    total = 0
+    with SessionLocal() as db:
+        for titles, done in chunks:
+            total += len(add_tasks(db, titles, done))
+            db.expunge_all()
+    return total
+
+
+def cmd_search(args: argparse.Namespace) -> int:
+    from nightwatch.db import SessionLocal, init_db
+    from nightwatch.services import search
+
+    init_db()
+    with SessionLocal() as db:
+        hits, _ = search(db, " ".join(args.query), args.limit)
+    if not hits:
+        _print("no matches")
+        return 1
+    for h in hits:
+        snippet = " ".join(h["snippet"].split())
+        _print(f"[{h['kind']} {h['id']}] {snippet}")
+    return 0
+
+
+def _parse_at(raw: str) -> datetime:
+    if raw == "now":
+        return datetime.now(timezone.utc)
+    dt = datetime.fromisoformat(raw)
+    # Naive times are local wall-clock time, which is what operators type.
+    return dt.astimezone(timezone.utc) if dt.tzinfo is None else dt
+
+
+def cmd_restore(args: argparse.Namespace) -> int:
+    from nightwatch.backup import restore_backup
+    from nightwatch.config import get_settings
+    from nightwatch.incremental_backup import restore_points
+
+    s = get_settings()
+    if args.list:
+        for p in restore_points(s.backups_dir):
+            _print(f"{p.at.astimezone().isoformat(timespec='seconds')} {p.path}")
+        for p in sorted(s.backups_dir.glob("nightwatch-*.db")):
+            _print(f"{datetime.fromtimestamp(p.stat().st_mtime).astimezone().isoformat(timespec='seconds')} {p}")
+        return 0
+    at = _parse_at(args.at)
+    if args.out:
+        out = Path(args.out).expanduser()
+    else:
+        out = s.data_dir / f"nightwatch-restored-{at.strftime('%Y%m%dT%H%M%SZ')}.db"
+    if out.resolve() == s.db_path.resolve():
+        _print("refusing to overwrite the live database; stop the server and move the restored file into place")
+        return 2
+    try:
+        point_at, src = restore_backup(s.backups_dir, at, out)
+    except LookupError as e:
+        _print(str(e))
+        return 1
+    _print(f"restored: {out} (as of {point_at.astimezone().isoformat(timespec='seconds')} from {src.name})")
+    return 0
+
+
+def cmd_archive(args: argparse.Namespace) -> int:
+    import sqlite3
+
+    from nightwatch.archive import archive_closed_shifts
+    from nightwatch.config import get_settings
+    from nightwatch.migrate import apply_migrations
+
+    s = get_settings()
+    days = args.days if args.days is not None else s.archive_after_days
+    if days <= 0:
+        _print("archiving is off; set archive_after_days or pass --days")
+        return 2
+    apply_migrations(s.db_path)
+    moved = archive_closed_shifts(s.db_path, s.archive_dir, days)
+    for period, shifts, tasks in moved:
+        _print(f"{period}: {shifts} shifts, {tasks} tasks")
+    _print(f"archived: {sum(m[1] for m in moved)} shifts into {s.archive_dir}")
+    if args.vacuum:
+        # Deleted rows only free pages inside the file; VACUUM gives them back.
+        conn = sqlite3.connect(s.db_path, timeout=30.0)
+        try:
+            conn.execute("VACUUM")
+        finally:
+            conn.close()
+        _print(f"vacuumed: {s.db_path} ({s.db_path.stat().st_size // 1024} KiB)")
     return 0
 
 
@@ -100,6 +384,14 @@ def build_parser() -> argparse.ArgumentParser:
     sp.add_argument("--port", default=None, type=int)
     sp.set_defaults(func=cmd_serve)
 
+    sp = sub.add_parser("agent", help="sample this machine and push batches to a Nightwatch server")
+    sp.add_argument("--push", required=True, help="server URL, e.g. http://nightwatch.local:8037")
+    sp.add_argument("--host", default=None, help="name to report as (default: hostname)")
+    sp.add_argument("--interval", default=1.0, type=float, help="seconds between samples")
+    sp.add_argument("--push-every", default=5.0, type=float, help="seconds between pushes")
+    sp.add_argument("--token", default=None, help="ingest token (default: ingest_token from config)")
+    sp.set_defaults(func=cmd_agent)
+
     sp = sub.add_parser("status", help="show current state")
     sp.set_defaults(func=cmd_status)
 
@@ -111,6 +403,30 @@ def build_parser() -> argparse.ArgumentParser:
 
     sp = sub.add_parser("tasks", help="list tasks for the active shift")
     sp.set_defaults(func=cmd_tasks)
+    tsub = sp.add_subparsers(dest="tasks_cmd")
+    tp = tsub.add_parser("import", help="import a checklist file (one task per line, '-' for stdin)")
+    tp.add_argument("file")
+    tp.add_argument("--chunk-size", default=500, type=int, help="tasks per transaction")
+    tp.set_defaults(func=cmd_tasks_import)
+
+    sp = sub.add_parser("migrate", help="apply pending migrations (resumable; shows data-migration progress)")
+    sp.set_defaults(func=cmd_migrate)
+
+    sp = sub.add_parser("search", help="full-text search task titles and shift notes")
+    sp.add_argument("query", nargs="+")
+    sp.add_argument("--limit", default=20, type=int)
+    sp.set_defaults(func=cmd_search)
+
+    sp = sub.add_parser("archive", help="move old closed shifts into per-month archive files")
+    sp.add_argument("--days", default=None, type=float, help="archive shifts ended more than this many days ago")
+    sp.add_argument("--vacuum", action="store_true", help="compact the live database afterwards")
+    sp.set_defaults(func=cmd_archive)
+
+    sp = sub.add_parser("restore", help="rebuild the database from backups as of a point in time")
+    sp.add_argument("--at", default="now", help="ISO time (local unless offset given) or 'now'")
+    sp.add_argument("--out", default=None, help="output path (default: data_dir/nightwatch-restored-<time>.db)")
+    sp.add_argument("--list", action="store_true", help="list available restore points")
+    sp.set_defaults(func=cmd_restore)
 
     return p
 
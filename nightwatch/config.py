@@ -54,13 +54,57 @@ def _writable_backups_dir(preferred: Path, fallback: Path) -> Path:
         return fallback
 
 
+_JOURNAL_MODES = {"delete", "truncate", "persist", "wal"}
+_SYNC_LEVELS = {"off", "normal", "full", "extra"}
+_BACKUP_MODES = {"daily", "incremental"}
+
+
+def _choice(name: str, value: str, allowed: set[str]) -> str:
+    v = str(value).strip().lower()
+    if v not in allowed:
+        raise ValueError(f"{name} must be one of {sorted(allowed)}, got {value!r}")
+    return v
+
+
+def _flag(value: object) -> bool:
+    return str(value).strip().lower() in ("1", "true", "yes", "on")
+
+
+def _intervals(env: str | None, table: dict) -> tuple[tuple[str, float], ...]:
+    # TOML table {name = seconds}; the env var overrides it as "name=seconds,name=seconds".
+    if env:
+        table = {}
+        for part in env.split(","):
+            name, sep, value = part.partition("=")
+            if not sep:
+                raise ValueError(f"NIGHTWATCH_COLLECTOR_INTERVALS entries must be name=seconds, got {part!r}")
+            table[name.strip()] = value
+    return tuple((str(name), float(value)) for name, value in table.items())
+
+
 @dataclass(frozen=True)
 class Settings:
     data_dir: Path
     db_path: Path
+    metrics_db_path: Path
     backups_dir: Path
     host: str
     port: int
+    sample_interval_s: float
+    journal_mode: str
+    synchronous: str
+    group_commit: bool
+    group_commit_window_ms: float
+    backup_mode: str
+    backup_interval_hours: float
+    backup_base_days: float
+    backup_retention_days: float
+    control_socket: Path | None
+    archive_dir: Path
+    archive_after_days: float
+    ingest_token: str
+    # (collector name, seconds) overriding built-in cadences
+    collector_intervals: tuple[tuple[str, float], ...]
     config_path: Path | None
 
 
@@ -81,6 +125,10 @@ def get_settings() -> Settings:
 
     db_path = Path(os.environ.get("NIGHTWATCH_DB_PATH", nw.get("db_path", str(data_dir / "nightwatch.db")))).expanduser()
 
+    metrics_db_path = Path(
+        os.environ.get("NIGHTWATCH_METRICS_DB_PATH", nw.get("metrics_db_path", str(data_dir / "metrics.db")))
+    ).expanduser()
+
     preferred_backups = Path(
         os.environ.get("NIGHTWATCH_BACKUPS_DIR", nw.get("backups_dir", "/backups"))
     ).expanduser()
@@ -88,13 +136,75 @@ def get_settings() -> Settings:
 
     host = os.environ.get("NIGHTWATCH_HOST", nw.get("host", "127.0.0.1"))
     port = int(os.environ.get("NIGHTWATCH_PORT", str(nw.get("port", 8037))))
+    sample_interval_s = float(os.environ.get("NIGHTWATCH_SAMPLE_INTERVAL", str(nw.get("sample_interval", 3.0))))
+
+    journal_mode = _choice(
+        "journal_mode", os.environ.get("NIGHTWATCH_JOURNAL_MODE", nw.get("journal_mode", "delete")), _JOURNAL_MODES
+    )
+    synchronous = _choice(
+        "synchronous", os.environ.get("NIGHTWATCH_SYNCHRONOUS", nw.get("synchronous", "full")), _SYNC_LEVELS
+    )
+    group_commit = _flag(os.environ.get("NIGHTWATCH_GROUP_COMMIT", nw.get("group_commit", False)))
+    group_commit_window_ms = float(
+        os.environ.get("NIGHTWATCH_GROUP_COMMIT_WINDOW_MS", str(nw.get("group_commit_window_ms", 5.0)))
+    )
+
+    backup_mode = _choice(
+        "backup_mode", os.environ.get("NIGHTWATCH_BACKUP_MODE", nw.get("backup_mode", "daily")), _BACKUP_MODES
+    )
+    # Incremental backups read the live file inside one long read transaction;
+    # outside WAL that blocks every writer until the read finishes.
+    if backup_mode == "incremental" and journal_mode != "wal":
+        raise ValueError(f'backup_mode "incremental" requires journal_mode "wal", got {journal_mode!r}')
+    backup_interval_hours = float(
+        os.environ.get("NIGHTWATCH_BACKUP_INTERVAL_HOURS", str(nw.get("backup_interval_hours", 24.0)))
+    )
+    backup_base_days = float(os.environ.get("NIGHTWATCH_BACKUP_BASE_DAYS", str(nw.get("backup_base_days", 7.0))))
+    backup_retention_days = float(
+        os.environ.get("NIGHTWATCH_BACKUP_RETENTION_DAYS", str(nw.get("backup_retention_days", 0)))
+    )
+
+    # Unix socket the server listens on for CLI commands; "" disables it.
+    control_socket_raw = os.environ.get(
+        "NIGHTWATCH_CONTROL_SOCKET", nw.get("control_socket", str(data_dir / "nightwatch.sock"))
+    )
+    control_socket = Path(control_socket_raw).expanduser() if control_socket_raw else None
+
+    # Closed shifts older than this move to per-month archive files; 0 disables.
+    archive_dir = Path(
+        os.environ.get("NIGHTWATCH_ARCHIVE_DIR", nw.get("archive_dir", str(data_dir / "archive")))
+    ).expanduser()
+    archive_after_days = float(
+        os.environ.get("NIGHTWATCH_ARCHIVE_AFTER_DAYS", str(nw.get("archive_after_days", 0)))
+    )
+
+    # Shared secret agents send to POST /api/ingest; "" accepts any agent.
+    ingest_token = os.environ.get("NIGHTWATCH_INGEST_TOKEN", nw.get("ingest_token", ""))
+
+    # Per-collector sampling intervals, e.g. disks = 60 under [nightwatch.collectors].
+    collector_intervals = _intervals(os.environ.get("NIGHTWATCH_COLLECTOR_INTERVALS"), nw.get("collectors", {}))
 
     _CACHED = Settings(
         data_dir=data_dir,
         db_path=db_path,
+        metrics_db_path=metrics_db_path,
         backups_dir=backups_dir,
         host=host,
         port=port,
+        sample_interval_s=sample_interval_s,
+        journal_mode=journal_mode,
+        synchronous=synchronous,
+        group_commit=group_commit,
+        group_commit_window_ms=group_commit_window_ms,
+        backup_mode=backup_mode,
+        backup_interval_hours=backup_interval_hours,
+        backup_base_days=backup_base_days,
+        backup_retention_days=backup_retention_days,
+        control_socket=control_socket,
+        archive_dir=archive_dir,
+        archive_after_days=archive_after_days,
+        ingest_token=ingest_token,
+        collector_intervals=collector_intervals,
         config_path=config_path,
     )
     return _CACHED
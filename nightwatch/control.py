@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+# CLI side of the control socket. Stdlib only, so CLI startup stays cheap.
+#
+# Protocol: newline-delimited JSON over a Unix stream socket. Each request is
+# {"cmd": "<name>"} or {"cmd": "<name>", "args": {...}}; each reply is
+# {"ok": true, "data": {...}} or {"ok": false, "error": "..."}. A connection
+# may carry any number of requests in turn.
+
+import json
+import socket
+from pathlib import Path
+
+COMMANDS = ("status", "start-shift", "end-shift", "tasks", "tasks-import")
+
+# Longest request line the server accepts.
+LINE_LIMIT = 64 * 1024
+
+
+class ControlError(RuntimeError):
+    """The server received the command but could not carry it out."""
+
+
+def encode(msg: dict) -> bytes:
+    return json.dumps(msg, separators=(",", ":"), default=str).encode("utf-8") + b"\n"
+
+
+class Client:
+    """One open connection to the server; see `connect()`."""
+
+    def __init__(self, sock: socket.socket) -> None:
+        self._sock = sock
+        self._reader = sock.makefile("rb")
+
+    def call(self, cmd: str, args: dict | None = None) -> dict:
+        msg = {"cmd": cmd} if args is None else {"cmd": cmd, "args": args}
+        self._sock.sendall(encode(msg))
+        line = self._reader.readline()
+        if not line.endswith(b"\n"):
+            raise ControlError("server closed the connection")
+        reply = json.loads(line)
+        if not reply.get("ok"):
+            raise ControlError(reply.get("error") or "unknown error")
+        return reply["data"]
+
+    def close(self) -> None:
+        self._reader.close()
+        self._sock.close()
+
+    def __enter__(self) -> Client:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+def connect(path: Path | None, timeout: float = 10.0) -> Client | None:
+    """Connect to the server listening at `path`, or None if there is none."""
+    if path is None or not path.exists():
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(str(path))
+    except (ConnectionRefusedError, FileNotFoundError):
+        sock.close()
+        return None  # stale socket file left by a server that died
+    except BaseException:
+        sock.close()
+        raise
+    return Client(sock)
+
+
+def request(path: Path | None, cmd: str, args: dict | None = None, timeout: float = 10.0) -> dict | None:
+    """
+    Run `cmd` on the server listening at `path`.
+    Returns None if no server is listening, so the caller can fall back to the
+    database. Once connected, failures raise instead: a write may already have
+    been applied, so it must not be retried locally.
+    """
+    client = connect(path, timeout)
+    if client is None:
+        return None
+    with client:
+        return client.call(cmd, args)
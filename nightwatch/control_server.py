@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+# Server side of the control socket (see nightwatch.control for the protocol).
+# Commands run in the server process, so they share its caches, its sampler and
+# its single writer instead of opening the database from another process.
+
+import asyncio
+import json
+import os
+import socket
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+from nightwatch import async_services, services
+from nightwatch.control import LINE_LIMIT, encode
+from nightwatch.db import AsyncSessionLocal, SessionLocal
+from nightwatch.models import Shift, Task
+from nightwatch.system_watch import SystemSampler
+
+# Called with the request's "args" as keyword arguments.
+Handler = Callable[..., Awaitable[dict]]
+
+# Titles per tasks-import request (the CLI sends less, see LINE_LIMIT).
+IMPORT_MAX_TITLES = 2000
+
+
+def _in_use(path: Path) -> bool:
+    s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        s.connect(str(path))
+        return True
+    except OSError:
+        return False
+    finally:
+        s.close()
+
+
+def _active_tasks() -> tuple[Shift | None, list[Task]]:
+    # Reads take one hop to a worker thread on the sync engine; through the
+    # async driver each statement would be its own round trip.
+    with SessionLocal() as db:
+        shift = services.get_active_shift(db)
+        return shift, services.list_tasks_for_active_shift(db) if shift else []
+
+
+def build_handlers(sampler: SystemSampler) -> dict[str, Handler]:
+    async def status() -> dict:
+        shift, tasks = await asyncio.to_thread(_active_tasks)
+        snap = sampler.latest()
+        if snap is None:
+            snap = await asyncio.to_thread(sampler.sample)
+        return {
+            "shift": {"id": shift.id, "started_at": shift.started_at.isoformat()} if shift else None,
+            "tasks": {"total": len(tasks), "done": sum(1 for t in tasks if t.completed_at is not None)},
+            "system": snap,
+        }
+
+    async def start_shift() -> dict:
+        async with AsyncSessionLocal() as db:
+            shift, carried, already = await async_services.start_shift(db)
+        return {"id": shift.id, "carried": carried, "already": already}
+
+    async def end_shift() -> dict:
+        async with AsyncSessionLocal() as db:
+            shift = await async_services.end_shift(db)
+        if not shift:
+            return {"id": None}
+        return {"id": shift.id, "ended_at": shift.ended_at.isoformat() if shift.ended_at else ""}
+
+    async def tasks() -> dict:
+        shift, rows = await asyncio.to_thread(_active_tasks)
+        # oldest first for reading
+        return {
+            "active": shift is not None,
+            "tasks": [[t.id, t.title, t.completed_at is not None] for t in reversed(rows)],
+        }
+
+    async def tasks_import(titles: list, done: list | None = None) -> dict:
+        # One chunk of `nightwatch tasks import`: a single transaction through
+        # the writer, so dashboards are notified like any other write.
+        if not isinstance(titles, list) or not all(isinstance(t, str) for t in titles):
+            raise ValueError("titles must be a list of strings")
+        if len(titles) > IMPORT_MAX_TITLES:
+            raise ValueError(f"at most {IMPORT_MAX_TITLES} titles per request")
+        if done is not None and (not isinstance(done, list) or len(done) != len(titles)):
+            raise ValueError("done must be a list as long as titles")
+        async with AsyncSessionLocal() as db:
+            created = await async_services.add_tasks(db, [t[:240] for t in titles], done and [bool(d) for d in done])
+        return {"imported": len(created)}
+
+    return {
+        "status": status,
+        "start-shift": start_shift,
+        "end-shift": end_shift,
+        "tasks": tasks,
+        "tasks-import": tasks_import,
+    }
+
+
+class ControlServer:
+    """Unix-socket listener that runs CLI commands inside the server process."""
+
+    def __init__(self, path: Path, handlers: dict[str, Handler]) -> None:
+        self.path = path
+        self.handlers = handlers
+        self._server: asyncio.AbstractServer | None = None
+
+    async def start(self) -> bool:
+        """Start listening. False if another live server already owns the socket."""
+        if self.path.exists():
+            if _in_use(self.path):
+                return False
+            self.path.unlink()  # stale, from a server that didn't shut down cleanly
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Bind under a private umask so the socket is never reachable by other
+        # users, not even between bind and chmod.
+        old_umask = os.umask(0o077)
+        try:
+            self._server = await asyncio.start_unix_server(self._serve, path=str(self.path), limit=LINE_LIMIT)
+        finally:
+            os.umask(old_umask)
+        os.chmod(self.path, 0o600)
+        return True
+
+    async def stop(self) -> None:
+        if self._server is None:
+            return
+        self._server.close()
+        await self._server.wait_closed()
+        self._server = None
+        self.path.unlink(missing_ok=True)
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while line := await reader.readline():
+                writer.write(encode(await self._dispatch(line)))
+                await writer.drain()
+        except (ConnectionError, ValueError):
+            # Client went away, or sent an over-long line.
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, line: bytes) -> dict:
+        try:
+            msg = json.loads(line)
+            cmd, args = msg.get("cmd"), msg.get("args") or {}
+        except (ValueError, AttributeError):
+            return {"ok": False, "error": "bad request"}
+        handler = self.handlers.get(cmd)
+        if handler is None:
+            return {"ok": False, "error": f"unknown command: {cmd!r}"}
+        if not isinstance(args, dict):
+            return {"ok": False, "error": "bad request"}
+        try:
+            return {"ok": True, "data": await handler(**args)}
+        except Exception as e:
+            return {"ok": False, "error": str(e) or type(e).__name__}
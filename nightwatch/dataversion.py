@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from pathlib import Path
+
+# Monotonic in-process data version. Every service write bumps it; read
+# endpoints expose it as a strong ETag so unchanged polls short-circuit to 304.
+_lock = threading.Lock()
+_version = 0
+# Distinguishes server runs, since the counter restarts at 0.
+_BOOT = f"{os.getpid():x}.{int(time.time()):x}"
+
+
+def bump() -> int:
+    global _version
+    with _lock:
+        _version += 1
+        return _version
+
+
+def _file_stamp(db_path: Path) -> str:
+    # Writes from other processes (the CLI) don't bump our counter but do touch
+    # the DB file (or its WAL), so fold that into the tag too.
+    parts = []
+    for p in (db_path, db_path.with_name(db_path.name + "-wal")):
+        try:
+            st = os.stat(p)
+        except OSError:
+            continue
+        parts.append(f"{st.st_mtime_ns:x}.{st.st_size:x}")
+    return "-".join(parts)
+
+
+def etag(db_path: Path, scope: str) -> str:
+    return f'"{scope}-{_BOOT}-{_version}-{_file_stamp(db_path)}"'
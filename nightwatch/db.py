@@ -1,13 +1,16 @@
 from __future__ import annotations
 
-from collections.abc import Generator
+import time
+from collections.abc import AsyncGenerator, Generator
 
-from sqlalchemy import create_engine
+from sqlalchemy import Connection, create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
 
-from nightwatch.backup import ensure_daily_backup
+from nightwatch.backup import run_scheduled_backup
 from nightwatch.config import get_settings
 from nightwatch.migrate import apply_migrations
+from nightwatch.telemetry import record_query
 
 
 class Base(DeclarativeBase):
@@ -19,14 +22,47 @@ _engine = create_engine(
     f"sqlite:///{_settings.db_path}",
     connect_args={"check_same_thread": False},
 )
+
+
+def _apply_pragmas(dbapi_conn, _record) -> None:
+    # Values are validated against a fixed set in config.py.
+    cur = dbapi_conn.cursor()
+    try:
+        cur.execute(f"PRAGMA journal_mode={_settings.journal_mode}")
+        cur.execute(f"PRAGMA synchronous={_settings.synchronous}")
+    finally:
+        cur.close()
+
+
+def _query_start(conn, _cursor, _statement, _params, _context, _executemany) -> None:
+    conn.info.setdefault("nightwatch_t0", []).append(time.perf_counter())
+
+
+def _query_end(conn, _cursor, _statement, _params, _context, _executemany) -> None:
+    record_query(time.perf_counter() - conn.info["nightwatch_t0"].pop())
+
+
+def _instrument(engine) -> None:
+    event.listen(engine, "connect", _apply_pragmas)
+    event.listen(engine, "before_cursor_execute", _query_start)
+    event.listen(engine, "after_cursor_execute", _query_end)
+
+
+_instrument(_engine)
 SessionLocal = sessionmaker(bind=_engine, autocommit=False, autoflush=False, class_=Session)
 
+# Async path for the web app; the CLI keeps the sync engine above.
+_async_engine = create_async_engine(f"sqlite+aiosqlite:///{_settings.db_path}")
+_instrument(_async_engine.sync_engine)
+AsyncSessionLocal = async_sessionmaker(bind=_async_engine, autoflush=False, expire_on_commit=False)
+
 
-def init_db() -> None:
+def init_db(backup: bool = True) -> None:
     # Apply versioned SQL migrations first; models assume the schema exists.
     apply_migrations(get_settings().db_path)
-    # Daily backup (no-op if already created today).
-    ensure_daily_backup(get_settings().db_path, get_settings().backups_dir)
+    # Scheduled backup (no-op if one is already current). The server defers this to its backup loop.
+    if backup:
+        run_scheduled_backup(get_settings())
 
 
 def get_db() -> Generator[Session, None, None]:
@@ -36,3 +72,16 @@ def get_db() -> Generator[Session, None, None]:
     finally:
         db.close()
 
+
+def connect_writer() -> Connection:
+    """A dedicated sync connection for the group-commit writer (nightwatch.writer)."""
+    return _engine.connect()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def dispose_async_engine() -> None:
+    await _async_engine.dispose()
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import signal
+import threading
+from collections.abc import Callable
+
+_EXIT_SIGNALS = (signal.SIGINT, signal.SIGTERM)
+
+
+def sse_frame(event: str, data: dict) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'), default=str)}\n\n".encode("utf-8")
+
+
+class EventHub:
+    """
+    In-process broadcast hub for the dashboard event stream.
+
+    `publish()` is safe to call from any thread (services run in the threadpool,
+    the sampler on its own thread). Each event is encoded once, then handed to
+    every subscriber's queue on its event loop.
+    """
+
+    def __init__(self, queue_size: int = 64) -> None:
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subs: list[tuple[asyncio.AbstractEventLoop, asyncio.Queue[bytes | None]]] = []
+
+    def subscribe(self) -> asyncio.Queue[bytes | None]:
+        q: asyncio.Queue[bytes | None] = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subs.append((asyncio.get_running_loop(), q))
+        return q
+
+    def unsubscribe(self, q: asyncio.Queue[bytes | None]) -> None:
+        with self._lock:
+            self._subs = [(loop, s) for loop, s in self._subs if s is not q]
+
+    def publish(self, event: str, data: dict) -> None:
+        subs = self._subs
+        if not subs:
+            return
+        self._send(sse_frame(event, data))
+
+    def close(self) -> None:
+        """Tell every open stream to finish (server shutdown)."""
+        self._send(None)
+
+    def close_on_exit_signals(self) -> Callable[[], None]:
+        """
+        Also close() on SIGINT/SIGTERM, ahead of the handlers the server
+        installed: servers wait for open responses before running lifespan
+        shutdown, so streams closed only there would hold shutdown up to the
+        graceful timeout. Returns a function that restores the handlers.
+        Does nothing off the main thread or where no Python handler is set.
+        """
+        if threading.current_thread() is not threading.main_thread():
+            return lambda: None
+        previous: dict[int, Callable] = {}
+
+        def handler(sig: int, frame) -> None:
+            self.close()
+            previous[sig](sig, frame)
+
+        for sig in _EXIT_SIGNALS:
+            current = signal.getsignal(sig)
+            if callable(current):
+                previous[sig] = current
+                signal.signal(sig, handler)
+
+        def restore() -> None:
+            for sig, prev in previous.items():
+                if signal.getsignal(sig) is handler:
+                    signal.signal(sig, prev)
+
+        return restore
+
+    def _send(self, frame: bytes | None) -> None:
+        for loop, q in self._subs:
+            try:
+                loop.call_soon_threadsafe(_offer, q, frame)
+            except RuntimeError:
+                # Loop already closed (server shutting down).
+                pass
+
+
+def _offer(q: asyncio.Queue[bytes | None], frame: bytes | None) -> None:
+    # Slow client: drop its oldest frame rather than blocking everyone else.
+    if q.full():
+        try:
+            q.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+    q.put_nowait(frame)
+
+
+hub = EventHub()
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+# Remote hosts reporting through `nightwatch agent --push`. Everything is kept
+# in process memory (latest snapshot plus a bounded ring of compact samples
+# per host), so ingest never writes to a database; a restart starts empty and
+# agents refill it within seconds.
+
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+# Samples kept per host: one hour at the agent's default 1 s cadence.
+HISTORY_LEN = 3600
+# Beyond this the host heard from least recently is dropped.
+MAX_HOSTS = 256
+
+# Compact history record, in this order.
+_POINT = ("cpu_percent", "ram_percent", "disk_percent", "temp_c")
+
+
+@dataclass
+class _Host:
+    latest: dict
+    # monotonic time the latest sample arrived
+    seen: float
+    # (unix ts, cpu, ram, disk, temp, network_up)
+    history: deque = field(default_factory=lambda: deque(maxlen=HISTORY_LEN))
+
+
+class HostRegistry:
+    """Latest state and recent history per remote host. Safe to use from any thread."""
+
+    def __init__(self, max_hosts: int = MAX_HOSTS) -> None:
+        self.max_hosts = max_hosts
+        self._lock = threading.Lock()
+        self._hosts: OrderedDict[str, _Host] = OrderedDict()
+
+    def ingest(self, host: str, samples: list[dict]) -> int:
+        """Store a batch (oldest first). Samples older than what's stored are skipped."""
+        if not samples:
+            return 0
+        now = time.monotonic()
+        with self._lock:
+            h = self._hosts.get(host)
+            if h is None:
+                if len(self._hosts) >= self.max_hosts:
+                    self._hosts.popitem(last=False)
+                h = self._hosts[host] = _Host(latest=samples[-1], seen=now)
+            last_ts = h.history[-1][0] if h.history else float("-inf")
+            added = 0
+            for s in samples:
+                ts = s["at"].timestamp()
+                if ts <= last_ts:
+                    continue  # resent after a failed push that did arrive
+                h.history.append((ts, *(s[k] for k in _POINT), s["network_up"]))
+                h.latest = s
+                last_ts = ts
+                added += 1
+            h.seen = now
+            self._hosts.move_to_end(host)
+        return added
+
+    def latest(self, host: str) -> dict | None:
+        """Latest snapshot, with `age_s` counted from when it arrived."""
+        with self._lock:
+            h = self._hosts.get(host)
+            if h is None:
+                return None
+            return {**h.latest, "age_s": round(time.monotonic() - h.seen, 3)}
+
+    def hosts(self) -> list[dict]:
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {"host": name, "last_seen_s": round(now - h.seen, 3), "samples": len(h.history)}
+                for name, h in sorted(self._hosts.items())
+            ]
+
+    def history(self, host: str, since: datetime, until: datetime) -> list[dict] | None:
+        """Raw points in [since, until], in the shape of MetricsStore.query()."""
+        lo, hi = since.timestamp(), until.timestamp()
+        with self._lock:
+            h = self._hosts.get(host)
+            if h is None:
+                return None
+            rows = [r for r in h.history if lo <= r[0] <= hi]
+        points = []
+        for ts, cpu, ram, disk, temp, net in rows:
+            p: dict = {"at": datetime.fromtimestamp(ts, timezone.utc), "n": 1}
+            for name, v in (("cpu", cpu), ("ram", ram), ("disk", disk), ("temp", temp)):
+                p[f"{name}_min"] = p[f"{name}_max"] = p[f"{name}_avg"] = v
+            p["net_up"] = 1.0 if net else 0.0
+            points.append(p)
+        return points
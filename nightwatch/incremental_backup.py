@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import shutil
+import sqlite3
+import struct
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import BinaryIO
+
+# Incremental backups: a chain is a directory holding one compressed base
+# snapshot plus compressed deltas of the pages that changed since the previous
+# restore point.
+#
+#   <backups_dir>/incremental/<base stamp>/base.db.gz
+#   <backups_dir>/incremental/<base stamp>/<stamp>.delta.gz
+#   <backups_dir>/incremental/<base stamp>/pages.hashes   (state for the next delta)
+#
+# Pages are read straight from the database file inside a read transaction
+# taken right after a TRUNCATE checkpoint, so the file is consistent and no
+# full temporary copy is ever written. This needs WAL, where writers carry on
+# meanwhile; in rollback-journal modes the read lock would stall them past
+# their busy timeout, so those databases are refused.
+
+CHAINS_DIRNAME = "incremental"
+_STAMP = "%Y%m%dT%H%M%SZ"
+_DELTA_MAGIC = b"NWDELTA1"
+_HASH_SIZE = 16
+_SNAPSHOT_ATTEMPTS = 5
+
+Progress = Callable[[int, int], None]
+
+
+@dataclass(frozen=True)
+class RestorePoint:
+    at: datetime
+    chain: Path
+    path: Path
+
+
+def _stamp(dt: datetime) -> str:
+    return dt.astimezone(timezone.utc).strftime(_STAMP)
+
+
+def _parse_stamp(s: str) -> datetime | None:
+    try:
+        return datetime.strptime(s, _STAMP).replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+
+
+def _page_hash(page: bytes) -> bytes:
+    return hashlib.blake2b(page, digest_size=_HASH_SIZE).digest()
+
+
+@contextmanager
+def _stable_file(db_path: Path) -> Iterator[tuple[BinaryIO, int, int]]:
+    """Yields (file, page_size, page_count) while the main DB file is guaranteed stable."""
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    wal = db_path.with_name(db_path.name + "-wal")
+    try:
+        mode = str(conn.execute("PRAGMA journal_mode").fetchone()[0]).lower()
+        if mode != "wal":
+            raise RuntimeError(f'incremental backups need journal_mode "wal"; {db_path.name} uses {mode!r}')
+        for attempt in range(_SNAPSHOT_ATTEMPTS):
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+            conn.execute("BEGIN")
+            conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+            # An empty WAL means our snapshot lives entirely in the main file, and
+            # no checkpoint can rewrite it while we hold the snapshot.
+            if not wal.exists() or wal.stat().st_size == 0:
+                break
+            conn.execute("ROLLBACK")
+            time.sleep(0.1 * (attempt + 1))
+        else:
+            raise RuntimeError("database stayed busy; could not take a checkpointed snapshot")
+        page_size = int(conn.execute("PRAGMA page_size").fetchone()[0])
+        page_count = int(conn.execute("PRAGMA page_count").fetchone()[0])
+        with open(db_path, "rb") as f:
+            yield f, page_size, page_count
+        conn.execute("ROLLBACK")
+    finally:
+        conn.close()
+
+
+def _iter_pages(f: BinaryIO, page_size: int, page_count: int, progress: Progress | None) -> Iterator[bytes]:
+    for i in range(page_count):
+        page = f.read(page_size)
+        if len(page) != page_size:
+            raise RuntimeError(f"short read at page {i + 1}")
+        if progress and (i % 256 == 0 or i + 1 == page_count):
+            progress(i + 1, page_count)
+        yield page
+
+
+def _chains_dir(backups_dir: Path) -> Path:
+    return backups_dir / CHAINS_DIRNAME
+
+
+def _chains(backups_dir: Path) -> list[tuple[datetime, Path]]:
+    root = _chains_dir(backups_dir)
+    if not root.exists():
+        return []
+    out = []
+    for p in root.iterdir():
+        at = _parse_stamp(p.name)
+        if at and (p / "base.db.gz").exists():
+            out.append((at, p))
+    out.sort()
+    return out
+
+
+def _deltas(chain: Path) -> list[tuple[datetime, Path]]:
+    out = []
+    for p in chain.glob("*.delta.gz"):
+        at = _parse_stamp(p.name.split(".", 1)[0])
+        if at:
+            out.append((at, p))
+    out.sort()
+    return out
+
+
+def restore_points(backups_dir: Path) -> list[RestorePoint]:
+    points = []
+    for at, chain in _chains(backups_dir):
+        points.append(RestorePoint(at=at, chain=chain, path=chain / "base.db.gz"))
+        points += [RestorePoint(at=d_at, chain=chain, path=p) for d_at, p in _deltas(chain)]
+    points.sort(key=lambda p: p.at)
+    return points
+
+
+def create_base(db_path: Path, backups_dir: Path, progress: Progress | None = None) -> Path:
+    now = datetime.now(timezone.utc)
+    chain = _chains_dir(backups_dir) / _stamp(now)
+    tmp = chain.with_name(chain.name + ".part")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    hashes = bytearray()
+    with _stable_file(db_path) as (f, page_size, page_count):
+        with gzip.open(tmp / "base.db.gz", "wb", compresslevel=6) as out:
+            for page in _iter_pages(f, page_size, page_count, progress):
+                out.write(page)
+                hashes += _page_hash(page)
+    (tmp / "pages.hashes").write_bytes(bytes(hashes))
+    tmp.rename(chain)
+    return chain / "base.db.gz"
+
+
+def create_delta(db_path: Path, chain: Path, progress: Progress | None = None) -> Path | None:
+    """Write the pages changed since the chain's last restore point. None if nothing changed."""
+    prev = (chain / "pages.hashes").read_bytes()
+    now = datetime.now(timezone.utc)
+    out_path = chain / f"{_stamp(now)}.delta.gz"
+    tmp = out_path.with_name(out_path.name + ".part")
+    hashes = bytearray()
+    changed = 0
+    with _stable_file(db_path) as (f, page_size, page_count):
+        with gzip.open(tmp, "wb", compresslevel=6) as out:
+            out.write(_DELTA_MAGIC + struct.pack(">II", page_size, page_count))
+            for i, page in enumerate(_iter_pages(f, page_size, page_count, progress)):
+                h = _page_hash(page)
+                hashes += h
+                if prev[i * _HASH_SIZE : (i + 1) * _HASH_SIZE] != h:
+                    out.write(struct.pack(">I", i + 1) + page)
+                    changed += 1
+    if changed == 0 and len(hashes) == len(prev):
+        tmp.unlink(missing_ok=True)
+        return None
+    tmp.rename(out_path)
+    (chain / "pages.hashes").write_bytes(bytes(hashes))
+    return out_path
+
+
+def ensure_incremental_backup(
+    db_path: Path,
+    backups_dir: Path,
+    interval: timedelta,
+    base_every: timedelta,
+    progress: Progress | None = None,
+) -> Path | None:
+    """
+    Take a restore point if the last one is older than `interval`: a new base
+    when the current chain is older than `base_every`, otherwise a delta.
+    """
+    now = datetime.now(timezone.utc)
+    chains = _chains(backups_dir)
+    if not chains or now - chains[-1][0] >= base_every:
+        return create_base(db_path, backups_dir, progress)
+    _, chain = chains[-1]
+    deltas = _deltas(chain)
+    last = deltas[-1][0] if deltas else chains[-1][0]
+    if now - last < interval:
+        return None
+    return create_delta(db_path, chain, progress)
+
+
+def _apply_delta(delta: Path, db: BinaryIO) -> None:
+    with gzip.open(delta, "rb") as f:
+        head = f.read(len(_DELTA_MAGIC) + 8)
+        if head[: len(_DELTA_MAGIC)] != _DELTA_MAGIC:
+            raise ValueError(f"not a delta file: {delta}")
+        page_size, page_count = struct.unpack(">II", head[len(_DELTA_MAGIC) :])
+        db.truncate(page_size * page_count)
+        while True:
+            rec = f.read(4)
+            if not rec:
+                break
+            (pgno,) = struct.unpack(">I", rec)
+            page = f.read(page_size)
+            if len(page) != page_size:
+                raise ValueError(f"truncated delta file: {delta}")
+            db.seek((pgno - 1) * page_size)
+            db.write(page)
+
+
+def restore(backups_dir: Path, at: datetime, out: Path) -> RestorePoint:
+    """Rebuild the database as of the latest restore point at or before `at` into `out`."""
+    candidates = [p for p in restore_points(backups_dir) if p.at <= at]
+    if not candidates:
+        raise LookupError(f"no incremental restore point at or before {at.isoformat()}")
+    point = candidates[-1]
+    tmp = out.with_name(out.name + ".part")
+    with gzip.open(point.chain / "base.db.gz", "rb") as src, open(tmp, "wb") as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+    with open(tmp, "r+b") as dst:
+        for d_at, delta in _deltas(point.chain):
+            if d_at > point.at:
+                break
+            _apply_delta(delta, dst)
+    tmp.replace(out)
+    return point
+
+
+def prune_chains(backups_dir: Path, cutoff: datetime) -> list[Path]:
+    """Delete chains whose newest restore point is older than `cutoff` (never the latest chain)."""
+    removed = []
+    chains = _chains(backups_dir)
+    for at, chain in chains[:-1]:
+        deltas = _deltas(chain)
+        newest = deltas[-1][0] if deltas else at
+        if newest < cutoff:
+            shutil.rmtree(chain, ignore_errors=True)
+            removed.append(chain)
+    return removed
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+# JSON bytes for the lean read path (already-shaped rows, no model validation).
+# Uses orjson when installed (the "fast" extra), else the stdlib. Both write
+# datetimes the way Pydantic does: ISO 8601, fraction only when non-zero, "Z"
+# for UTC.
+
+import json
+from collections.abc import Iterable, Sequence
+from datetime import date, datetime
+
+try:
+    import orjson
+except ModuleNotFoundError:  # optional
+    orjson = None
+
+
+def _default(v: object) -> str:
+    if isinstance(v, datetime):
+        s = v.isoformat()
+        return s[:-6] + "Z" if s.endswith("+00:00") else s
+    if isinstance(v, date):
+        return v.isoformat()
+    raise TypeError(f"not JSON serializable: {type(v).__name__}")
+
+
+def dumps(obj: object) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_UTC_Z)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=_default).encode("utf-8")
+
+
+def dump_rows(fields: tuple[str, ...], items: Iterable[Sequence[object]]) -> bytes:
+    """Encode tuples as a JSON array of objects keyed by `fields`."""
+    return dumps([dict(zip(fields, r)) for r in items])
@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Fixed-width numeric records in ring-buffered tables; slots are overwritten in place,
+# so the file never grows past its capacity.
+# raw: one row per sample (~1 day at 3s). m1/m15: min/max/avg rollups.
+RAW_CAPACITY = 28_800
+M1_CAPACITY = 7 * 24 * 60  # 7 days
+M15_CAPACITY = 90 * 24 * 4  # 90 days
+
+_FIELDS = ("cpu", "ram", "disk", "temp")
+_SNAP_KEYS = {"cpu": "cpu_percent", "ram": "ram_percent", "disk": "disk_percent", "temp": "temp_c"}
+
+_ROLLUP_COLS = ", ".join(f"{f}_min REAL, {f}_max REAL, {f}_avg REAL" for f in _FIELDS)
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS raw (
+  slot INTEGER PRIMARY KEY,
+  ts REAL NOT NULL,
+  cpu REAL, ram REAL, disk REAL, temp REAL,
+  net INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_raw_ts ON raw(ts);
+
+CREATE TABLE IF NOT EXISTS m1 (
+  slot INTEGER PRIMARY KEY,
+  ts REAL NOT NULL,
+  n INTEGER NOT NULL,
+  {_ROLLUP_COLS},
+  net_up REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_m1_ts ON m1(ts);
+
+CREATE TABLE IF NOT EXISTS m15 (
+  slot INTEGER PRIMARY KEY,
+  ts REAL NOT NULL,
+  n INTEGER NOT NULL,
+  {_ROLLUP_COLS},
+  net_up REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_m15_ts ON m15(ts);
+"""
+
+_TIERS = {"m1": (60, M1_CAPACITY), "m15": (900, M15_CAPACITY)}
+RESOLUTIONS = ("raw", "m1", "m15")
+
+
+@dataclass
+class _Bucket:
+    start: float
+    n: int = 0
+    net_up: float = 0.0
+
+    def __post_init__(self) -> None:
+        self.mins: dict[str, float | None] = {f: None for f in _FIELDS}
+        self.maxs: dict[str, float | None] = {f: None for f in _FIELDS}
+        self.sums: dict[str, float] = {f: 0.0 for f in _FIELDS}
+        self.counts: dict[str, int] = {f: 0 for f in _FIELDS}
+
+    def add(self, n: int, net_up: float, values: dict[str, tuple[float, float, float] | None]) -> None:
+        # values: field -> (min, max, avg) over `n` samples, or None when missing.
+        self.n += n
+        self.net_up += net_up * n
+        for f, v in values.items():
+            if v is None:
+                continue
+            lo, hi, avg = v
+            self.mins[f] = lo if self.mins[f] is None else min(self.mins[f], lo)
+            self.maxs[f] = hi if self.maxs[f] is None else max(self.maxs[f], hi)
+            self.sums[f] += avg * n
+            self.counts[f] += n
+
+    def merge(self, other: _Bucket) -> None:
+        self.n += other.n
+        self.net_up += other.net_up
+        for f in _FIELDS:
+            for mine, theirs, pick in ((self.mins, other.mins, min), (self.maxs, other.maxs, max)):
+                if theirs[f] is not None:
+                    mine[f] = theirs[f] if mine[f] is None else pick(mine[f], theirs[f])
+            self.sums[f] += other.sums[f]
+            self.counts[f] += other.counts[f]
+
+    def row(self) -> tuple:
+        cols: list[float | None] = []
+        for f in _FIELDS:
+            c = self.counts[f]
+            cols += [self.mins[f], self.maxs[f], (self.sums[f] / c) if c else None]
+        return (self.start, self.n, *cols, self.net_up / self.n if self.n else 0.0)
+
+
+def _row_values(row: tuple) -> dict[str, tuple[float, float, float] | None]:
+    # (ts, n, <min, max, avg per field>, net_up) -> field -> (min, max, avg) or None
+    values = {f: (row[2 + i * 3], row[3 + i * 3], row[4 + i * 3]) for i, f in enumerate(_FIELDS)}
+    return {f: (None if v[0] is None else v) for f, v in values.items()}
+
+
+class MetricsStore:
+    """
+    Bounded time-series store for system samples (separate SQLite file, so it
+    stays out of the main DB and its backups).
+    """
+
+    def __init__(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        # Written by the sampler thread, read by request threads.
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        row = self._conn.execute("SELECT slot FROM raw ORDER BY ts DESC LIMIT 1").fetchone()
+        self._raw_slot = int(row[0]) if row else -1
+        self._open: dict[str, _Bucket | None] = {"m1": None, "m15": None}
+        # What an earlier run already wrote for the open bucket's window (e.g.
+        # the partial bucket close() flushed before a restart); merged back on flush.
+        self._stored: dict[str, _Bucket | None] = {"m1": None, "m15": None}
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush("m1", None)
+            self._flush("m15", None)
+            self._conn.close()
+
+    def append(self, snap: dict) -> None:
+        at: datetime = snap["at"]
+        ts = at.timestamp()
+        vals = {f: snap.get(k) for f, k in _SNAP_KEYS.items()}
+        net = 1 if snap.get("network_up") else 0
+        with self._lock:
+            self._raw_slot = (self._raw_slot + 1) % RAW_CAPACITY
+            self._conn.execute(
+                "INSERT OR REPLACE INTO raw(slot, ts, cpu, ram, disk, temp, net) VALUES (?,?,?,?,?,?,?)",
+                (self._raw_slot, ts, *(vals[f] for f in _FIELDS), net),
+            )
+            self._rollup("m1", ts, 1, float(net), {f: None if v is None else (v, v, v) for f, v in vals.items()})
+
+    def _rollup(self, tier: str, ts: float, n: int, net_up: float, values: dict) -> None:
+        width, _ = _TIERS[tier]
+        start = ts - (ts % width)
+        cur = self._open[tier]
+        if cur is not None and cur.start != start:
+            self._flush(tier, cur)
+            cur = None
+        if cur is None:
+            cur = self._open[tier] = _Bucket(start=start)
+            self._stored[tier] = self._load(tier, start)
+        cur.add(n, net_up, values)
+
+    def _load(self, tier: str, start: float) -> _Bucket | None:
+        width, capacity = _TIERS[tier]
+        r = self._conn.execute(f"SELECT * FROM {tier} WHERE slot = ?", (int(start // width) % capacity,)).fetchone()
+        if r is None or r[1] != start or not r[2]:
+            return None  # empty slot, or one left over from an older window
+        # Per-field counts aren't stored; fields are taken as present in all n samples.
+        b = _Bucket(start=start)
+        b.add(r[2], r[-1], _row_values(r[1:]))
+        return b
+
+    def _merged(self, tier: str) -> _Bucket | None:
+        """The open bucket combined with what was stored for its window."""
+        cur, stored = self._open[tier], self._stored[tier]
+        if cur is None or stored is None:
+            return cur
+        out = _Bucket(start=cur.start)
+        out.merge(stored)
+        out.merge(cur)
+        return out
+
+    def _pending(self, tier: str) -> list[_Bucket]:
+        """Buckets of `tier` not flushed yet, oldest first, with their stored partials merged in."""
+        out: list[_Bucket] = []
+        cur = self._merged(tier)
+        m1 = self._open["m1"]
+        if tier == "m15" and m1 is not None and m1.n:
+            # Minutes still in the open m1 bucket haven't reached m15 yet.
+            width, _ = _TIERS["m15"]
+            start = m1.start - (m1.start % width)
+            preview = _Bucket(start=start)
+            if cur is not None and cur.start == start:
+                preview.merge(cur)
+            else:
+                if cur is not None:
+                    out.append(cur)
+                stored = self._load("m15", start)
+                if stored is not None:
+                    preview.merge(stored)
+            preview.merge(m1)
+            cur = preview
+        if cur is not None and cur.n:
+            out.append(cur)
+        return out
+
+    def _flush(self, tier: str, bucket: _Bucket | None) -> None:
+        # Closing an m1 bucket feeds it into the m15 tier.
+        bucket = bucket or self._open[tier]
+        if bucket is None or bucket.n == 0:
+            return
+        width, capacity = _TIERS[tier]
+        slot = int(bucket.start // width) % capacity
+        row = self._merged(tier).row()
+        ph = ",".join("?" * (len(row) + 1))
+        self._conn.execute(f"INSERT OR REPLACE INTO {tier} VALUES ({ph})", (slot, *row))
+        self._open[tier] = self._stored[tier] = None
+        if tier == "m1":
+            # Only this run's samples: the stored part already reached m15 when it was written.
+            fresh = bucket.row()
+            self._rollup("m15", bucket.start, bucket.n, fresh[-1], _row_values(fresh))
+
+    def query(self, since: datetime, until: datetime, resolution: str | None = None) -> tuple[str, list[dict]]:
+        """
+        Returns (resolution, points) for [since, until]. Without an explicit
+        resolution, picks the coarsest tier that still gives useful detail.
+        """
+        lo, hi = since.timestamp(), until.timestamp()
+        if resolution is None:
+            span = hi - lo
+            resolution = "raw" if span <= 3600 else ("m1" if span <= 24 * 3600 else "m15")
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"unknown resolution: {resolution}")
+
+        with self._lock:
+            if resolution == "raw":
+                rows = self._conn.execute(
+                    "SELECT ts, 1, cpu, cpu, cpu, ram, ram, ram, disk, disk, disk, temp, temp, temp, net "
+                    "FROM raw WHERE ts BETWEEN ? AND ? ORDER BY ts",
+                    (lo, hi),
+                ).fetchall()
+            else:
+                rows = self._conn.execute(
+                    f"SELECT * FROM {resolution} WHERE ts BETWEEN ? AND ? ORDER BY ts", (lo, hi)
+                ).fetchall()
+                rows = [r[1:] for r in rows]
+                # Include buckets still being filled (in place of their stored partials, if any).
+                for cur in self._pending(resolution):
+                    if lo <= cur.start <= hi:
+                        rows = [r for r in rows if r[0] != cur.start]
+                        rows.append(cur.row())
+
+        points = []
+        for r in rows:
+            p: dict = {"at": datetime.fromtimestamp(r[0], timezone.utc), "n": int(r[1])}
+            for i, f in enumerate(_FIELDS):
+                p[f"{f}_min"], p[f"{f}_max"], p[f"{f}_avg"] = r[2 + i * 3 : 5 + i * 3]
+            p["net_up"] = float(r[-1])
+            points.append(p)
+        return resolution, points
@@ -1,8 +1,29 @@
 from __future__ import annotations
 
+import hashlib
+import importlib.util
 import sqlite3
+import time
+from collections.abc import Callable
 from dataclasses import dataclass
+from functools import cache
 from pathlib import Path
+from types import ModuleType
+
+# Migrations live in nightwatch/migrations as "NNNN_name.sql" (schema changes,
+# applied with executescript) or "NNNN_name.py" (data migrations, see
+# _run_data_migration). Versions share one sequence.
+#
+# Fast path: once everything is applied, PRAGMA user_version is set to a
+# fingerprint of the bundled migrations. If it still matches on the next start
+# nothing else is read from the database.
+
+# Pause between data-migration batches so other connections get the write lock.
+DATA_BATCH_PAUSE_S = 0.005
+DATA_BATCH_SIZE = 1000
+
+# (migration, rows done, rows total or None)
+Progress = Callable[["Migration", int, "int | None"], None]
 
 
 @dataclass(frozen=True)
@@ -10,6 +31,10 @@ class Migration:
     version: int
     path: Path
 
+    @property
+    def is_data(self) -> bool:
+        return self.path.suffix == ".py"
+
 
 def _migrations_dir() -> Path:
     return Path(__file__).parent / "migrations"
@@ -17,8 +42,10 @@ def _migrations_dir() -> Path:
 
 def list_migrations() -> list[Migration]:
     migs: list[Migration] = []
-    for p in sorted(_migrations_dir().glob("*.sql")):
-        # expects "0001_name.sql"
+    for p in sorted(_migrations_dir().iterdir()):
+        if p.suffix not in (".sql", ".py"):
+            continue
+        # expects "0001_name.sql" / "0004_name.py"
         stem = p.stem.split("_", 1)[0]
         try:
             version = int(stem)
@@ -29,6 +56,21 @@ def list_migrations() -> list[Migration]:
     return migs
 
 
+@cache
+def fingerprint() -> int:
+    """Checksum of the bundled migrations, as a positive 31-bit int for PRAGMA user_version."""
+    h = hashlib.blake2b(digest_size=4)
+    for m in list_migrations():
+        h.update(m.path.name.encode("utf-8"))
+        h.update(m.path.read_bytes())
+    return (int.from_bytes(h.digest(), "big") & 0x7FFFFFFF) or 1
+
+
+def is_current(conn: sqlite3.Connection) -> bool:
+    """True if every bundled migration has been applied (one header read, no table access)."""
+    return int(conn.execute("PRAGMA user_version").fetchone()[0]) == fingerprint()
+
+
 def current_version(conn: sqlite3.Connection) -> int:
     try:
         row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
@@ -40,22 +82,80 @@ def current_version(conn: sqlite3.Connection) -> int:
         return 0
 
 
-def apply_migrations(db_path: Path) -> int:
+def _load(m: Migration) -> ModuleType:
+    spec = importlib.util.spec_from_file_location(f"nightwatch_migration_{m.version:04d}", m.path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"cannot load migration {m.path.name}")
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def _run_data_migration(conn: sqlite3.Connection, m: Migration, progress: Progress | None) -> None:
+    """
+    Run a Python data migration in short, resumable batches.
+
+    The module defines `run_batch(conn, after, limit) -> (cursor, rows)`: handle
+    up to `limit` rows keyed after `after`, returning the new cursor and how
+    many rows were handled (0 when finished). It may define `BATCH_SIZE` and
+    `count(conn) -> int` (for progress). Each batch commits together with its
+    cursor, so an interrupted run picks up where it stopped.
+    """
+    mod = _load(m)
+    limit = int(getattr(mod, "BATCH_SIZE", DATA_BATCH_SIZE))
+    total = mod.count(conn) if hasattr(mod, "count") else None
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS migration_progress ("
+        " version INTEGER NOT NULL PRIMARY KEY,"
+        " cursor INTEGER NOT NULL,"
+        " rows_done INTEGER NOT NULL)"
+    )
+    conn.commit()
+    row = conn.execute("SELECT cursor, rows_done FROM migration_progress WHERE version = ?", (m.version,)).fetchone()
+    after, done = row if row else (0, 0)
+    if progress:
+        progress(m, done, total)
+    while True:
+        with conn:
+            after, n = mod.run_batch(conn, after, limit)
+            if n:
+                done += n
+                conn.execute(
+                    "INSERT OR REPLACE INTO migration_progress(version, cursor, rows_done) VALUES (?, ?, ?)",
+                    (m.version, after, done),
+                )
+            else:
+                conn.execute("DELETE FROM migration_progress WHERE version = ?", (m.version,))
+                conn.execute("INSERT INTO schema_version(version) VALUES (?)", (m.version,))
+        if progress:
+            progress(m, done, total)
+        if not n:
+            return
+        time.sleep(DATA_BATCH_PAUSE_S)
+
+
+def apply_migrations(db_path: Path, progress: Progress | None = None) -> int:
     db_path.parent.mkdir(parents=True, exist_ok=True)
     conn = sqlite3.connect(db_path)
     try:
+        if is_current(conn):
+            return 0
         conn.execute("PRAGMA foreign_keys=ON")
         cur = current_version(conn)
         applied = 0
         for m in list_migrations():
             if m.version <= cur:
                 continue
-            sql = m.path.read_text(encoding="utf-8")
-            conn.executescript(sql)
-            conn.commit()
+            if m.is_data:
+                _run_data_migration(conn, m, progress)
+            else:
+                sql = m.path.read_text(encoding="utf-8")
+                conn.executescript(sql)
+                conn.commit()
             applied += 1
             cur = m.version
+        conn.execute(f"PRAGMA user_version = {fingerprint()}")
+        conn.commit()
         return applied
     finally:
         conn.close()
-
@@ -0,0 +1,9 @@
+-- Nightwatch schema v2
+-- Keyset pagination over a shift's tasks: WHERE shift_id = ? AND id < ? ORDER BY id DESC.
+
+CREATE INDEX IF NOT EXISTS idx_tasks_shift_id_id ON tasks(shift_id, id);
+
+-- Prefix of the composite index above; no longer needed.
+DROP INDEX IF EXISTS idx_tasks_shift_id;
+
+INSERT INTO schema_version(version) VALUES (2);
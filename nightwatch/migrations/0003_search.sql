@@ -0,0 +1,45 @@
+-- Nightwatch schema v3
+-- Full-text search over task titles and shift notes (SQLite FTS5).
+-- External-content tables: the text lives in tasks/shifts, triggers keep the index in sync.
+
+CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+  title,
+  content='tasks',
+  content_rowid='id',
+  tokenize='unicode61 remove_diacritics 2'
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS shifts_fts USING fts5(
+  notes,
+  content='shifts',
+  content_rowid='id',
+  tokenize='unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER IF NOT EXISTS tasks_fts_ai AFTER INSERT ON tasks BEGIN
+  INSERT INTO tasks_fts(rowid, title) VALUES (new.id, new.title);
+END;
+CREATE TRIGGER IF NOT EXISTS tasks_fts_ad AFTER DELETE ON tasks BEGIN
+  INSERT INTO tasks_fts(tasks_fts, rowid, title) VALUES ('delete', old.id, old.title);
+END;
+CREATE TRIGGER IF NOT EXISTS tasks_fts_au AFTER UPDATE OF title ON tasks BEGIN
+  INSERT INTO tasks_fts(tasks_fts, rowid, title) VALUES ('delete', old.id, old.title);
+  INSERT INTO tasks_fts(rowid, title) VALUES (new.id, new.title);
+END;
+
+CREATE TRIGGER IF NOT EXISTS shifts_fts_ai AFTER INSERT ON shifts BEGIN
+  INSERT INTO shifts_fts(rowid, notes) VALUES (new.id, new.notes);
+END;
+CREATE TRIGGER IF NOT EXISTS shifts_fts_ad AFTER DELETE ON shifts BEGIN
+  INSERT INTO shifts_fts(shifts_fts, rowid, notes) VALUES ('delete', old.id, old.notes);
+END;
+CREATE TRIGGER IF NOT EXISTS shifts_fts_au AFTER UPDATE OF notes ON shifts BEGIN
+  INSERT INTO shifts_fts(shifts_fts, rowid, notes) VALUES ('delete', old.id, old.notes);
+  INSERT INTO shifts_fts(rowid, notes) VALUES (new.id, new.notes);
+END;
+
+-- Index existing rows.
+INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild');
+INSERT INTO shifts_fts(shifts_fts) VALUES ('rebuild');
+
+INSERT INTO schema_version(version) VALUES (3);
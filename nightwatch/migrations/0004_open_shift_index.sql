@@ -0,0 +1,7 @@
+-- Nightwatch schema v4
+-- Active-shift lookup: WHERE ended_at IS NULL ORDER BY id DESC LIMIT 1.
+-- Only open shifts are indexed, so it stays a handful of entries.
+
+CREATE INDEX IF NOT EXISTS idx_shifts_open ON shifts(id) WHERE ended_at IS NULL;
+
+INSERT INTO schema_version(version) VALUES (4);
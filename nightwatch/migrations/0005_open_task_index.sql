@@ -0,0 +1,10 @@
+-- Nightwatch schema v5
+-- Shift start carries every unfinished task forward (WHERE completed_at IS NULL).
+-- Index only the open tasks; the full completed_at index was mostly NULLs and
+-- nothing else filters on it.
+
+CREATE INDEX IF NOT EXISTS idx_tasks_open ON tasks(id) WHERE completed_at IS NULL;
+
+DROP INDEX IF EXISTS idx_tasks_completed_at;
+
+INSERT INTO schema_version(version) VALUES (5);
@@ -0,0 +1,14 @@
+-- Nightwatch schema v6
+-- Closed shifts can move to per-month archive files (see nightwatch.archive).
+-- One row per archive file: the shift id range it holds, for history reads.
+
+CREATE TABLE IF NOT EXISTS archives (
+  period TEXT NOT NULL PRIMARY KEY,
+  min_shift_id INTEGER NOT NULL,
+  max_shift_id INTEGER NOT NULL,
+  shifts INTEGER NOT NULL,
+  tasks INTEGER NOT NULL,
+  updated_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f','now'))
+);
+
+INSERT INTO schema_version(version) VALUES (6);
@@ -0,0 +1,33 @@
+-- Nightwatch schema v7
+-- Change log for delta sync (GET /api/changes): one row per touched task or
+-- shift, written by triggers so every writer (web, CLI, batches, carry-over)
+-- is covered. Only the key is kept; readers fetch the row's current state and
+-- treat a missing row as deleted. Old entries are pruned by the server.
+
+CREATE TABLE IF NOT EXISTS change_log (
+  seq INTEGER PRIMARY KEY AUTOINCREMENT,
+  entity TEXT NOT NULL,
+  row_id INTEGER NOT NULL
+);
+
+CREATE TRIGGER IF NOT EXISTS tasks_log_ai AFTER INSERT ON tasks BEGIN
+  INSERT INTO change_log(entity, row_id) VALUES ('task', new.id);
+END;
+CREATE TRIGGER IF NOT EXISTS tasks_log_au AFTER UPDATE ON tasks BEGIN
+  INSERT INTO change_log(entity, row_id) VALUES ('task', new.id);
+END;
+CREATE TRIGGER IF NOT EXISTS tasks_log_ad AFTER DELETE ON tasks BEGIN
+  INSERT INTO change_log(entity, row_id) VALUES ('task', old.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS shifts_log_ai AFTER INSERT ON shifts BEGIN
+  INSERT INTO change_log(entity, row_id) VALUES ('shift', new.id);
+END;
+CREATE TRIGGER IF NOT EXISTS shifts_log_au AFTER UPDATE ON shifts BEGIN
+  INSERT INTO change_log(entity, row_id) VALUES ('shift', new.id);
+END;
+CREATE TRIGGER IF NOT EXISTS shifts_log_ad AFTER DELETE ON shifts BEGIN
+  INSERT INTO change_log(entity, row_id) VALUES ('shift', old.id);
+END;
+
+INSERT INTO schema_version(version) VALUES (7);
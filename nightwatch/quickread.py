@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+# Cheap read path for the CLI (`status`, `tasks`): plain sqlite3, read-only,
+# no SQLAlchemy/ORM and no migration run. Only used when the schema is already
+# at the latest bundled migration; callers fall back to the full path otherwise.
+
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+
+from nightwatch.migrate import is_current
+
+
+def open_if_current(db_path: Path) -> sqlite3.Connection | None:
+    """Read-only connection if the DB exists and needs no migrations, else None."""
+    if not db_path.exists():
+        return None
+    try:
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    except sqlite3.Error:
+        return None
+    if not is_current(conn):
+        conn.close()
+        return None
+    return conn
+
+
+def _dt(raw: str | None) -> datetime | None:
+    return datetime.fromisoformat(raw) if raw else None
+
+
+def active_shift(conn: sqlite3.Connection) -> tuple[int, datetime] | None:
+    """(id, started_at) of the active shift, or None."""
+    row = conn.execute("SELECT id, started_at FROM shifts WHERE ended_at IS NULL ORDER BY id DESC LIMIT 1").fetchone()
+    return (int(row[0]), _dt(row[1])) if row else None
+
+
+def task_counts(conn: sqlite3.Connection, shift_id: int) -> tuple[int, int]:
+    """(total, done) for a shift."""
+    row = conn.execute(
+        "SELECT COUNT(*), COUNT(completed_at) FROM tasks WHERE shift_id = ?", (shift_id,)
+    ).fetchone()
+    return int(row[0]), int(row[1])
+
+
+def tasks_oldest_first(conn: sqlite3.Connection, shift_id: int) -> list[tuple[int, str, bool]]:
+    """(id, title, done) for a shift, oldest first."""
+    rows = conn.execute(
+        "SELECT id, title, completed_at IS NOT NULL FROM tasks WHERE shift_id = ? ORDER BY id", (shift_id,)
+    )
+    return [(int(r[0]), r[1], bool(r[2])) for r in rows]
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from datetime import datetime
+from typing import Annotated, Literal
 
 from pydantic import BaseModel, Field
 
@@ -12,6 +13,11 @@ class ShiftOut(BaseModel):
     notes: str
 
 
+class ShiftPageOut(BaseModel):
+    items: list[ShiftOut]
+    next_cursor: int | None
+
+
 class ShiftStartOut(BaseModel):
     shift: ShiftOut
     carried_task_count: int = 0
@@ -26,6 +32,14 @@ class TaskIn(BaseModel):
     title: str = Field(min_length=1, max_length=240)
 
 
+class TaskBatchIn(BaseModel):
+    # Applied in order: create, complete, reopen, delete.
+    create: list[Annotated[str, Field(min_length=1, max_length=240)]] = Field(default_factory=list, max_length=5000)
+    complete: list[int] = Field(default_factory=list, max_length=5000)
+    reopen: list[int] = Field(default_factory=list, max_length=5000)
+    delete: list[int] = Field(default_factory=list, max_length=5000)
+
+
 class TaskOut(BaseModel):
     id: int
     title: str
@@ -34,7 +48,66 @@ class TaskOut(BaseModel):
     shift_id: int | None
 
 
-class SystemOut(BaseModel):
+class TaskPageOut(BaseModel):
+    items: list[TaskOut]
+    next_cursor: int | None
+
+
+class TaskBatchOut(BaseModel):
+    created: list[TaskOut]
+    completed: int
+    reopened: int
+    deleted: int
+
+
+class ChangesOut(BaseModel):
+    cursor: int
+    reset: bool
+    tasks: list[TaskOut]
+    shifts: list[ShiftOut]
+    deleted_tasks: list[int]
+    deleted_shifts: list[int]
+
+
+class SearchHitOut(BaseModel):
+    kind: Literal["task", "shift"]
+    id: int
+    shift_id: int | None
+    at: datetime
+    snippet: str
+    score: float
+
+
+class SearchOut(BaseModel):
+    items: list[SearchHitOut]
+    next_offset: int | None
+
+
+class BackupStatusOut(BaseModel):
+    running: bool
+    path: str | None
+    pages_total: int
+    pages_done: int
+    started_at: datetime | None
+    finished_at: datetime | None
+    error: str | None
+
+
+class DiskOut(BaseModel):
+    mount: str
+    percent: float
+    used_gb: float
+    total_gb: float
+
+
+class InterfaceOut(BaseModel):
+    name: str
+    # bytes per second since the previous reading
+    rx_bps: float
+    tx_bps: float
+
+
+class SystemIn(BaseModel):
     at: datetime
     cpu_percent: float
     ram_percent: float
@@ -45,4 +118,75 @@ class SystemOut(BaseModel):
     disk_total_gb: float
     temp_c: float | None
     network_up: bool
+    disks: list[DiskOut] = Field(default_factory=list, max_length=32)
+    interfaces: list[InterfaceOut] = Field(default_factory=list, max_length=32)
+
+
+class SystemOut(SystemIn):
+    age_s: float = 0.0
+
+
+class IngestIn(BaseModel):
+    host: str = Field(min_length=1, max_length=64, pattern=r"^[A-Za-z0-9._-]+$")
+    # Oldest first.
+    samples: list[SystemIn] = Field(max_length=3600)
+
+
+class IngestOut(BaseModel):
+    stored: int
+
+
+class HostOut(BaseModel):
+    host: str
+    last_seen_s: float
+    samples: int
+
+
+class ProcessOut(BaseModel):
+    pid: int
+    name: str
+    cpu_percent: float
+    rss_mb: float
+
+
+class ProcessesOut(BaseModel):
+    at: datetime
+    count: int
+    items: list[ProcessOut]
+
+
+class CollectorOut(BaseModel):
+    name: str
+    interval_s: float
+    effective_interval_s: float
+    timeout_s: float
+    runs: int
+    errors: int
+    failing: bool
+    last_error: str | None
+    avg_cost_ms: float
+    last_cost_ms: float
+    next_in_s: float
+
+
+class SystemPointOut(BaseModel):
+    at: datetime
+    n: int
+    cpu_min: float | None
+    cpu_max: float | None
+    cpu_avg: float | None
+    ram_min: float | None
+    ram_max: float | None
+    ram_avg: float | None
+    disk_min: float | None
+    disk_max: float | None
+    disk_avg: float | None
+    temp_min: float | None
+    temp_max: float | None
+    temp_avg: float | None
+    net_up: float
+
 
+class SystemHistoryOut(BaseModel):
+    resolution: str
+    points: list[SystemPointOut]
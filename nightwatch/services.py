@@ -1,10 +1,13 @@
 from __future__ import annotations
 
+from collections.abc import Sequence
 from datetime import datetime, timezone
 
-from sqlalchemy import select, update
+from sqlalchemy import Engine, Row, delete, event, insert, select, text, update
 from sqlalchemy.orm import Session
 
+from nightwatch import archive, dataversion
+from nightwatch.events import hub
 from nightwatch.models import Shift, Task
 
 
@@ -12,12 +15,80 @@ def _utcnow() -> datetime:
     return datetime.now(timezone.utc)
 
 
+# Inside a group-commit batch (see nightwatch.writer) the writer owns the
+# transaction: services only flush, and notifications wait for the batch commit.
+BATCH_KEY = "nightwatch.batch"
+
+
+def _commit(db: Session, *refresh: object) -> None:
+    if BATCH_KEY in db.info:
+        db.flush()
+    else:
+        db.commit()
+    for obj in refresh:
+        db.refresh(obj)
+
+
+def _changed(db: Session, topic: str, data: dict) -> None:
+    # Called after every write: new data version, then notify listeners.
+    pending = db.info.get(BATCH_KEY)
+    if pending is not None:
+        pending.append((topic, data))
+        return
+    notify(topic, data)
+
+
+def notify(topic: str, data: dict) -> None:
+    dataversion.bump()
+    hub.publish(topic, data)
+
+
+# Active shift id, cached per connection in `Connection.info`. An entry stays
+# valid while no shift was started or ended in this process (generation) and
+# no other connection has committed since (PRAGMA data_version), which also
+# covers writes made by a separate CLI process.
+_ACTIVE_KEY = "nightwatch.active_shift"
+_PENDING_KEY = "nightwatch.shift_pending"
+_shift_generation = 0
+
+
+def _invalidate_active_shift(db: Session) -> None:
+    global _shift_generation
+    _shift_generation += 1
+    db.connection().info[_PENDING_KEY] = True
+
+
+def _on_commit(conn) -> None:
+    conn.info.pop(_PENDING_KEY, None)
+
+
+def _on_rollback(conn) -> None:
+    # A rolled-back start/end may already be cached on this connection.
+    if conn.info.pop(_PENDING_KEY, False):
+        conn.info.pop(_ACTIVE_KEY, None)
+
+
+event.listen(Engine, "commit", _on_commit)
+event.listen(Engine, "rollback", _on_rollback)
+
+
+def active_shift_id(db: Session) -> int | None:
+    conn = db.connection()
+    version = conn.exec_driver_sql("PRAGMA data_version").scalar()
+    cached = conn.info.get(_ACTIVE_KEY)
+    if cached is not None and cached[0] == _shift_generation and cached[1] == version:
+        return cached[2]
+    generation = _shift_generation
+    shift_id = db.execute(
+        select(Shift.id).where(Shift.ended_at.is_(None)).order_by(Shift.id.desc()).limit(1)
+    ).scalar()
+    conn.info[_ACTIVE_KEY] = (generation, version, shift_id)
+    return shift_id
+
+
 def get_active_shift(db: Session) -> Shift | None:
-    return (
-        db.execute(select(Shift).where(Shift.ended_at.is_(None)).order_by(Shift.id.desc()))
-        .scalars()
-        .first()
-    )
+    shift_id = active_shift_id(db)
+    return db.get(Shift, shift_id) if shift_id is not None else None
 
 
 def start_shift(db: Session) -> tuple[Shift, int, bool]:
@@ -31,16 +102,43 @@ def start_shift(db: Session) -> tuple[Shift, int, bool]:
     s = Shift(started_at=_utcnow(), ended_at=None, notes="")
     db.add(s)
     db.flush()
+    _invalidate_active_shift(db)
 
-    carried = db.execute(
-        update(Task)
-        .where(Task.completed_at.is_(None))
-        .values(shift_id=s.id)
-        .execution_options(synchronize_session="fetch")
-    )
-    db.commit()
-    db.refresh(s)
-    return s, int(getattr(carried, "rowcount", 0) or 0), False
+    carried = _carry_open_tasks(db, s.id)
+    _commit(db, s)
+    _changed(db, "shift", {"id": s.id})
+    _changed(db, "tasks", {"shift_id": s.id})
+    return s, carried, False
+
+
+# Open tasks reassigned per statement on shift start.
+CARRY_CHUNK = 2000
+
+_NEXT_OPEN_CHUNK = text(
+    "SELECT MAX(id) FROM (SELECT id FROM tasks WHERE completed_at IS NULL AND id > :after ORDER BY id LIMIT :n)"
+)
+
+
+def _carry_open_tasks(db: Session, shift_id: int) -> int:
+    """
+    Move every unfinished task to `shift_id`; returns the exact count.
+    Walks the open-task index in id ranges so each UPDATE stays small, and
+    skips the ORM session sync (tasks are re-read by whoever needs them).
+    """
+    carried = 0
+    after = 0
+    while True:
+        last = db.execute(_NEXT_OPEN_CHUNK, {"after": after, "n": CARRY_CHUNK}).scalar()
+        if last is None:
+            return carried
+        res = db.execute(
+            update(Task)
+            .where(Task.completed_at.is_(None), Task.id > after, Task.id <= last)
+            .values(shift_id=shift_id)
+            .execution_options(synchronize_session=False)
+        )
+        carried += int(res.rowcount or 0)
+        after = last
 
 
 def end_shift(db: Session) -> Shift | None:
@@ -49,8 +147,10 @@ def end_shift(db: Session) -> Shift | None:
         return None
     active.ended_at = _utcnow()
     db.add(active)
-    db.commit()
-    db.refresh(active)
+    _invalidate_active_shift(db)
+    _commit(db, active)
+    _changed(db, "shift", {"id": active.id})
+    _changed(db, "tasks", {"shift_id": active.id})
     return active
 
 
@@ -60,28 +160,243 @@ def set_shift_notes(db: Session, shift_id: int, notes: str) -> Shift | None:
         return None
     s.notes = notes
     db.add(s)
-    db.commit()
-    db.refresh(s)
+    _commit(db, s)
+    _changed(db, "shift", {"id": s.id})
     return s
 
 
 def list_tasks_for_active_shift(db: Session) -> list[Task]:
-    active = get_active_shift(db)
-    if not active:
+    shift_id = active_shift_id(db)
+    if shift_id is None:
         return []
     return (
-        db.execute(select(Task).where(Task.shift_id == active.id).order_by(Task.id.desc()))
+        db.execute(select(Task).where(Task.shift_id == shift_id).order_by(Task.id.desc()))
         .scalars()
         .all()
     )
 
 
+# Lean read path for the polled endpoints: plain column tuples (no ORM
+# identity map or attribute instrumentation), in TaskOut / ShiftOut field order.
+TASK_FIELDS = ("id", "title", "created_at", "completed_at", "shift_id")
+SHIFT_FIELDS = ("id", "started_at", "ended_at", "notes")
+
+
+def active_shift_row(db: Session) -> Row | None:
+    return db.execute(
+        select(Shift.id, Shift.started_at, Shift.ended_at, Shift.notes)
+        .where(Shift.ended_at.is_(None))
+        .order_by(Shift.id.desc())
+        .limit(1)
+    ).first()
+
+
+def active_task_rows(db: Session) -> Sequence[Row]:
+    """Same rows as list_tasks_for_active_shift (newest first), in one statement."""
+    active_id = (
+        select(Shift.id).where(Shift.ended_at.is_(None)).order_by(Shift.id.desc()).limit(1).scalar_subquery()
+    )
+    return db.execute(
+        select(Task.id, Task.title, Task.created_at, Task.completed_at, Task.shift_id)
+        .where(Task.shift_id == active_id)
+        .order_by(Task.id.desc())
+    ).all()
+
+
+def get_shift(db: Session, shift_id: int) -> Shift | None:
+    """A live shift, else the archived copy."""
+    shift = db.get(Shift, shift_id)
+    if shift is not None:
+        return shift
+    for period in archive.periods_holding(db, shift_id):
+        with archive.attached(db, period):
+            q = select(Shift).where(Shift.id == shift_id)
+            shift = db.execute(q, execution_options={"schema_translate_map": archive.SCHEMA_MAP}).scalar_one_or_none()
+        if shift is not None:
+            return shift
+    return None
+
+
+# Delta sync (see migration 0007): more distinct rows than this since the
+# client's cursor, or a cursor older than the pruned log, and the client is
+# told to reload instead.
+CHANGES_LIMIT = 1000
+CHANGE_LOG_KEEP = 50_000
+
+_CHANGED_KEYS = text(
+    "SELECT entity, row_id FROM change_log WHERE seq > :since GROUP BY entity, row_id LIMIT :limit"
+)
+
+
+def change_cursor(db: Session) -> int:
+    # sqlite_sequence still has the last seq after the log was pruned empty.
+    return db.execute(text("SELECT seq FROM sqlite_sequence WHERE name = 'change_log'")).scalar() or 0
+
+
+def changes_since(db: Session, since: int | None) -> dict:
+    """
+    Task and shift rows inserted, updated or deleted after `since`, as
+    {cursor, reset, tasks, shifts, deleted_tasks, deleted_shifts} with rows as
+    TASK_FIELDS / SHIFT_FIELDS dicts. `reset` means the client should reload
+    (no cursor yet, cursor pruned away, or too much changed).
+    """
+    cursor = change_cursor(db)
+    out: dict = {"cursor": cursor, "reset": False, "tasks": [], "shifts": [], "deleted_tasks": [], "deleted_shifts": []}
+    if since is None or since > cursor:
+        out["reset"] = True
+        return out
+    if since == cursor:
+        return out
+    oldest = db.execute(text("SELECT min(seq) FROM change_log")).scalar()
+    if oldest is None or oldest > since + 1:
+        out["reset"] = True
+        return out
+    keys = db.execute(_CHANGED_KEYS, {"since": since, "limit": CHANGES_LIMIT + 1}).all()
+    if len(keys) > CHANGES_LIMIT:
+        out["reset"] = True
+        return out
+    task_ids = [k for e, k in keys if e == "task"]
+    shift_ids = [k for e, k in keys if e == "shift"]
+    tasks = [
+        r
+        for ids in _chunks(task_ids)
+        for r in db.execute(
+            select(Task.id, Task.title, Task.created_at, Task.completed_at, Task.shift_id).where(Task.id.in_(ids))
+        )
+    ]
+    shifts = [
+        r
+        for ids in _chunks(shift_ids)
+        for r in db.execute(select(Shift.id, Shift.started_at, Shift.ended_at, Shift.notes).where(Shift.id.in_(ids)))
+    ]
+    live_tasks = {r[0] for r in tasks}
+    live_shifts = {r[0] for r in shifts}
+    out["tasks"] = [dict(zip(TASK_FIELDS, r)) for r in tasks]
+    out["shifts"] = [dict(zip(SHIFT_FIELDS, r)) for r in shifts]
+    out["deleted_tasks"] = [i for i in task_ids if i not in live_tasks]
+    out["deleted_shifts"] = [i for i in shift_ids if i not in live_shifts]
+    return out
+
+
+def prune_change_log(db: Session, keep: int = CHANGE_LOG_KEEP) -> int:
+    n = db.execute(
+        text("DELETE FROM change_log WHERE seq <= (SELECT max(seq) FROM change_log) - :keep"), {"keep": keep}
+    ).rowcount
+    _commit(db)
+    return n
+
+
+def list_shifts(db: Session, cursor: int | None, limit: int) -> tuple[list[Shift], int | None]:
+    """
+    Newest first, keyset-paginated on id. Returns (page, next_cursor).
+    Archived shifts follow the live ones; an archive is only attached once the
+    page reaches into its id range.
+    """
+    q = select(Shift).order_by(Shift.id.desc()).limit(limit + 1)
+    if cursor is not None:
+        q = q.where(Shift.id < cursor)
+    rows = list(db.execute(q).scalars())
+    for period, max_id in archive.periods(db, below=cursor):
+        if len(rows) > limit and rows[limit].id > max_id:
+            break  # this and every older archive sort after the page
+        with archive.attached(db, period):
+            rows += db.execute(q, execution_options={"schema_translate_map": archive.SCHEMA_MAP}).scalars()
+        rows.sort(key=lambda s: s.id, reverse=True)
+    if len(rows) > limit:
+        return rows[:limit], rows[limit - 1].id
+    return rows, None
+
+
+def list_tasks_for_shift(
+    db: Session, shift_id: int, cursor: int | None, limit: int
+) -> tuple[list[Task], int | None]:
+    """
+    Newest first, keyset-paginated on (shift_id, id). Returns (page, next_cursor).
+    Tasks of an archived shift are read from its archive file.
+    """
+    q = select(Task).where(Task.shift_id == shift_id).order_by(Task.id.desc()).limit(limit + 1)
+    if cursor is not None:
+        q = q.where(Task.id < cursor)
+    rows = list(db.execute(q).scalars())
+    if not rows:
+        for period in archive.periods_holding(db, shift_id):
+            with archive.attached(db, period):
+                rows = list(db.execute(q, execution_options={"schema_translate_map": archive.SCHEMA_MAP}).scalars())
+            if rows:
+                break
+    if len(rows) > limit:
+        return rows[:limit], rows[limit - 1].id
+    return rows, None
+
+
+# {s} is the schema: "main." for the live database, or the attached archive.
+# bm25 is scaled by each index's own statistics, so scores from different
+# indexes can't be compared: hits are numbered by rank within their source and
+# interleaved on that rank (newest first among equal ranks).
+_SEARCH_TEMPLATE = """
+    SELECT *, row_number() OVER (ORDER BY score, at DESC) AS rank FROM (
+      SELECT 'task' AS kind, t.id AS id, t.shift_id AS shift_id, t.created_at AS at,
+             snippet(tasks_fts, 0, '[', ']', '…', 12) AS snippet, bm25(tasks_fts) AS score
+        FROM {s}tasks_fts JOIN {s}tasks t ON t.id = tasks_fts.rowid
+       WHERE tasks_fts MATCH :q
+    )
+    UNION ALL
+    SELECT *, row_number() OVER (ORDER BY score, at DESC) FROM (
+      SELECT 'shift' AS kind, s.id AS id, s.id AS shift_id, s.started_at AS at,
+             snippet(shifts_fts, 0, '[', ']', '…', 12) AS snippet, bm25(shifts_fts) AS score
+        FROM {s}shifts_fts JOIN {s}shifts s ON s.id = shifts_fts.rowid
+       WHERE shifts_fts MATCH :q
+    )
+    ORDER BY rank, at DESC
+    LIMIT :limit OFFSET :offset
+    """
+_SEARCH_SQL = text(_SEARCH_TEMPLATE.format(s="main."))
+_ARCHIVE_SEARCH_SQL = text(_SEARCH_TEMPLATE.format(s=f"{archive.ALIAS}."))
+
+
+def _fts_query(raw: str) -> str | None:
+    # Quote every term so user input can't hit FTS5 syntax errors; keep a trailing * as prefix match.
+    terms = []
+    for word in raw.split():
+        prefix = word.endswith("*")
+        word = word.rstrip("*").replace('"', "")
+        # Pure punctuation tokenizes to nothing and would match nothing.
+        if any(ch.isalnum() for ch in word):
+            terms.append(f'"{word}"' + ("*" if prefix else ""))
+    return " ".join(terms) or None
+
+
+def search(db: Session, query: str, limit: int, offset: int = 0) -> tuple[list[dict], int | None]:
+    """
+    Full-text search over task titles and shift notes, best bm25 matches of
+    each source first (see _SEARCH_TEMPLATE). Returns (hits, next_offset).
+    """
+    q = _fts_query(query)
+    if q is None:
+        return [], None
+    archives = archive.periods(db)
+    if not archives:
+        rows = db.execute(_SEARCH_SQL, {"q": q, "limit": limit + 1, "offset": offset}).mappings().all()
+    else:
+        # Each archive has its own indexes: take the top offset+limit+1 from
+        # every file and interleave them on per-source rank, as the SQL does.
+        params = {"q": q, "limit": offset + limit + 1, "offset": 0}
+        rows = [dict(r) for r in db.execute(_SEARCH_SQL, params).mappings()]
+        for period, _ in archives:
+            with archive.attached(db, period):
+                rows += [dict(r) for r in db.execute(_ARCHIVE_SEARCH_SQL, params).mappings()]
+        rows.sort(key=lambda r: r["at"], reverse=True)
+        rows.sort(key=lambda r: r["rank"])
+        rows = rows[offset : offset + limit + 1]
+    hits = [{k: v for k, v in r.items() if k != "rank"} for r in rows[:limit]]
+    return hits, (offset + limit if len(rows) > limit else None)
+
+
 def add_task(db: Session, title: str) -> Task:
-    active = get_active_shift(db)
-    t = Task(title=title.strip(), shift_id=active.id if active else None, completed_at=None)
+    t = Task(title=title.strip(), shift_id=active_shift_id(db), completed_at=None)
     db.add(t)
-    db.commit()
-    db.refresh(t)
+    _commit(db, t)
+    _changed(db, "tasks", {"id": t.id, "shift_id": t.shift_id})
     return t
 
 
@@ -91,8 +406,8 @@ def complete_task(db: Session, task_id: int) -> Task | None:
         return None
     t.completed_at = _utcnow()
     db.add(t)
-    db.commit()
-    db.refresh(t)
+    _commit(db, t)
+    _changed(db, "tasks", {"id": t.id, "shift_id": t.shift_id})
     return t
 
 
@@ -102,8 +417,8 @@ def reopen_task(db: Session, task_id: int) -> Task | None:
         return None
     t.completed_at = None
     db.add(t)
-    db.commit()
-    db.refresh(t)
+    _commit(db, t)
+    _changed(db, "tasks", {"id": t.id, "shift_id": t.shift_id})
     return t
 
 
@@ -111,7 +426,87 @@ def delete_task(db: Session, task_id: int) -> bool:
     t = db.get(Task, task_id)
     if not t:
         return False
+    shift_id = t.shift_id
     db.delete(t)
-    db.commit()
+    _commit(db)
+    _changed(db, "tasks", {"id": task_id, "shift_id": shift_id})
     return True
 
+
+# Bulk operations: set-based statements, one transaction per call.
+# IN-lists are chunked to stay well under SQLite's bound-parameter limit.
+_IN_CHUNK = 500
+
+
+def _chunks(ids: list[int]) -> list[list[int]]:
+    return [ids[i : i + _IN_CHUNK] for i in range(0, len(ids), _IN_CHUNK)]
+
+
+def _insert_tasks(
+    db: Session, titles: list[str], shift_id: int | None, done: list[bool] | None = None
+) -> list[Task]:
+    now = _utcnow() if done and any(done) else None
+    rows = [
+        {"title": t.strip(), "shift_id": shift_id, "completed_at": now if done and done[i] else None}
+        for i, t in enumerate(titles)
+        if t.strip()
+    ]
+    if not rows:
+        return []
+    return list(db.scalars(insert(Task).returning(Task), rows))
+
+
+def _set_completed(db: Session, ids: list[int], completed_at: datetime | None) -> int:
+    n = 0
+    for chunk in _chunks(ids):
+        res = db.execute(
+            update(Task)
+            .where(Task.id.in_(chunk))
+            .values(completed_at=completed_at)
+            .execution_options(synchronize_session=False)
+        )
+        n += int(res.rowcount or 0)
+    return n
+
+
+def _delete_tasks(db: Session, ids: list[int]) -> int:
+    n = 0
+    for chunk in _chunks(ids):
+        res = db.execute(delete(Task).where(Task.id.in_(chunk)).execution_options(synchronize_session=False))
+        n += int(res.rowcount or 0)
+    return n
+
+
+def add_tasks(db: Session, titles: list[str], done: list[bool] | None = None) -> list[Task]:
+    """
+    Insert many tasks (assigned to the active shift if present) in one
+    transaction. `done[i]` marks titles[i] completed on insert.
+    """
+    shift_id = active_shift_id(db)
+    created = _insert_tasks(db, titles, shift_id, done)
+    _commit(db)
+    if created:
+        _changed(db, "tasks", {"shift_id": shift_id})
+    return created
+
+
+def apply_task_batch(
+    db: Session,
+    create: list[str],
+    complete: list[int],
+    reopen: list[int],
+    delete_ids: list[int],
+) -> tuple[list[Task], int, int, int]:
+    """
+    Apply create/complete/reopen/delete in that order, in one transaction.
+    Returns (created, completed_count, reopened_count, deleted_count).
+    """
+    shift_id = active_shift_id(db)
+    created = _insert_tasks(db, create, shift_id)
+    completed = _set_completed(db, complete, _utcnow())
+    reopened = _set_completed(db, reopen, None)
+    deleted = _delete_tasks(db, delete_ids)
+    _commit(db)
+    if created or completed or reopened or deleted:
+        _changed(db, "tasks", {"shift_id": shift_id})
+    return created, completed, reopened, deleted
@@ -2,9 +2,17 @@ const $ = (id) => document.getElementById(id);
 
 const state = {
   shift: null,
-  tasks: [],
+  // id -> task, and id -> <li>, for the active shift
+  tasks: new Map(),
+  rows: new Map(),
+  // change-log position of the data on screen (null until the first full load)
+  // and the shift the task list was loaded for
+  cursor: null,
+  listShift: null,
+  sync: Promise.resolve(),
   focus: false,
   lastSystemOkAt: 0,
+  polls: [],
 };
 
 function fmtTime(d) {
@@ -23,11 +31,20 @@ function fmtDt(iso) {
   }
 }
 
+// GET path -> { etag, body }; lets unchanged polls come back as 304 with no body.
+const validators = new Map();
+
 async function api(path, opts = {}) {
+  const isGet = !opts.method || opts.method === "GET";
+  const headers = { "Content-Type": "application/json" };
+  const cached = isGet ? validators.get(path) : null;
+  if (cached) headers["If-None-Match"] = cached.etag;
   const res = await fetch(path, {
-    headers: { "Content-Type": "application/json" },
+    headers,
+    cache: "no-store",
     ...opts,
   });
+  if (res.status === 304 && cached) return cached.body;
   if (!res.ok) {
     let msg = `${res.status} ${res.statusText}`;
     try {
@@ -37,7 +54,10 @@ async function api(path, opts = {}) {
     throw new Error(msg);
   }
   if (res.status === 204) return null;
-  return res.json();
+  const body = await res.json();
+  const etag = res.headers.get("ETag");
+  if (isGet && etag) validators.set(path, { etag, body });
+  return body;
 }
 
 function setFocus(on) {
@@ -67,68 +87,117 @@ function renderShift() {
   $("shiftNotes").value = s.notes || "";
 }
 
-function renderTasks() {
-  const list = $("taskList");
-  list.innerHTML = "";
+function taskRow(id) {
+  const li = document.createElement("li");
+  li.dataset.id = id;
+
+  const cb = document.createElement("input");
+  cb.type = "checkbox";
+  cb.className = "task__check";
+  cb.addEventListener("change", async () => {
+    try {
+      if (cb.checked) await api(`/api/tasks/${id}/complete`, { method: "POST" });
+      else await api(`/api/tasks/${id}/reopen`, { method: "POST" });
+      await syncChanges();
+    } catch (e) {
+      cb.checked = !cb.checked;
+      toast(e.message);
+    }
+  });
 
-  const total = state.tasks.length;
-  const done = state.tasks.filter((t) => t.completed_at).length;
+  const title = document.createElement("div");
+  title.className = "task__title";
+
+  const actions = document.createElement("div");
+  actions.className = "task__actions";
+
+  const del = document.createElement("button");
+  del.className = "iconbtn";
+  del.type = "button";
+  del.textContent = "Del";
+  del.addEventListener("click", async () => {
+    try {
+      await api(`/api/tasks/${id}`, { method: "DELETE" });
+      await syncChanges();
+    } catch (e) {
+      toast(e.message);
+    }
+  });
+
+  actions.appendChild(del);
+  li.appendChild(cb);
+  li.appendChild(title);
+  li.appendChild(actions);
+  return li;
+}
+
+function fillRow(li, t) {
+  li.className = "task" + (t.completed_at ? " task--done" : "");
+  li.children[0].checked = !!t.completed_at;
+  if (li.children[1].textContent !== t.title) li.children[1].textContent = t.title;
+}
+
+// Newest (highest id) first; new tasks usually land at the top.
+function placeRow(list, li, id) {
+  let next = list.firstElementChild;
+  while (next && Number(next.dataset.id) > id) next = next.nextElementSibling;
+  if (next !== li) list.insertBefore(li, next);
+}
+
+function upsertTask(list, t) {
+  state.tasks.set(t.id, t);
+  let li = state.rows.get(t.id);
+  if (!li) {
+    li = taskRow(t.id);
+    state.rows.set(t.id, li);
+    placeRow(list, li, t.id);
+  }
+  fillRow(li, t);
+}
+
+function removeTask(id) {
+  state.tasks.delete(id);
+  state.rows.get(id)?.remove();
+  state.rows.delete(id);
+}
+
+function renderTaskMeta() {
+  const list = $("taskList");
+  const total = state.tasks.size;
+  let done = 0;
+  for (const t of state.tasks.values()) if (t.completed_at) done++;
   $("taskMeta").textContent = `${total} total / ${done} done`;
 
-  if (total === 0) {
-    const li = document.createElement("li");
-    li.className = "muted";
-    li.style.padding = "6px 2px";
-    li.textContent = state.shift ? "No tasks yet." : "Start a shift to use the ledger.";
-    list.appendChild(li);
-    return;
+  let empty = list.querySelector("li.muted");
+  if (total) return empty?.remove();
+  if (!empty) {
+    empty = document.createElement("li");
+    empty.className = "muted";
+    empty.style.padding = "6px 2px";
+    list.appendChild(empty);
   }
+  empty.textContent = state.shift ? "No tasks yet." : "Start a shift to use the ledger.";
+}
+
+// Full list (newest first): keeps the <li> of tasks that are still there.
+function renderTasks(tasks) {
+  const list = $("taskList");
+  const keep = new Set(tasks.map((t) => t.id));
+  for (const id of [...state.rows.keys()]) if (!keep.has(id)) removeTask(id);
+  for (const t of tasks) upsertTask(list, t);
+  renderTaskMeta();
+}
 
-  for (const t of state.tasks) {
-    const li = document.createElement("li");
-    li.className = "task" + (t.completed_at ? " task--done" : "");
-
-    const cb = document.createElement("input");
-    cb.type = "checkbox";
-    cb.className = "task__check";
-    cb.checked = !!t.completed_at;
-    cb.addEventListener("change", async () => {
-      try {
-        if (cb.checked) await api(`/api/tasks/${t.id}/complete`, { method: "POST" });
-        else await api(`/api/tasks/${t.id}/reopen`, { method: "POST" });
-        await refreshTasks();
-      } catch (e) {
-        cb.checked = !cb.checked;
-        toast(e.message);
-      }
-    });
-
-    const title = document.createElement("div");
-    title.className = "task__title";
-    title.textContent = t.title;
-
-    const actions = document.createElement("div");
-    actions.className = "task__actions";
-
-    const del = document.createElement("button");
-    del.className = "iconbtn";
-    del.type = "button";
-    del.textContent = "Del";
-    del.addEventListener("click", async () => {
-      try {
-        await api(`/api/tasks/${t.id}`, { method: "DELETE" });
-        await refreshTasks();
-      } catch (e) {
-        toast(e.message);
-      }
-    });
-
-    actions.appendChild(del);
-    li.appendChild(cb);
-    li.appendChild(title);
-    li.appendChild(actions);
-    list.appendChild(li);
+// Deltas from /api/changes: only touched rows change in the DOM.
+function applyTaskChanges(tasks, deleted) {
+  const list = $("taskList");
+  const active = state.listShift;
+  for (const t of tasks) {
+    if (active != null && t.shift_id === active) upsertTask(list, t);
+    else removeTask(t.id);
   }
+  for (const id of deleted) removeTask(id);
+  renderTaskMeta();
 }
 
 function renderSystem(sys) {
@@ -153,23 +222,90 @@ async function refreshShift() {
 }
 
 async function refreshTasks() {
-  state.tasks = await api("/api/tasks/current");
-  renderTasks();
+  const tasks = await api("/api/tasks/current");
+  state.listShift = state.shift?.id ?? null;
+  renderTasks(tasks);
+}
+
+// Full reload: take the change cursor first, so anything written during the
+// reload is replayed by the next sync (re-applying a row is harmless).
+async function reload() {
+  state.cursor = (await api("/api/changes")).cursor;
+  await refreshShift();
+  await refreshTasks();
+}
+
+async function pullChanges() {
+  if (state.cursor == null) return reload();
+  const ch = await api(`/api/changes?since=${state.cursor}`);
+  if (ch.reset) return reload();
+  if (ch.shifts.length || ch.deleted_shifts.length) await refreshShift();
+  // A different active shift means a different task list.
+  if ((state.shift?.id ?? null) !== state.listShift) {
+    state.cursor = ch.cursor;
+    return refreshTasks();
+  }
+  applyTaskChanges(ch.tasks, ch.deleted_tasks);
+  state.cursor = ch.cursor;
+}
+
+// One sync at a time; callers queue behind the running one.
+function syncChanges() {
+  const run = state.sync.then(pullChanges, pullChanges);
+  state.sync = run.catch(() => {});
+  return run;
+}
+
+function onSystem(sys) {
+  state.lastSystemOkAt = Date.now();
+  $("hbDot").classList.add("dot--ok");
+  renderSystem(sys);
+}
+
+function markOffline() {
+  $("hbDot").classList.remove("dot--ok");
+  const staleFor = Date.now() - state.lastSystemOkAt;
+  $("systemMeta").textContent = staleFor ? `offline (${Math.round(staleFor / 1000)}s)` : "offline";
 }
 
 async function pollSystem() {
   try {
-    const sys = await api("/api/system");
-    state.lastSystemOkAt = Date.now();
-    $("hbDot").classList.add("dot--ok");
-    renderSystem(sys);
+    onSystem(await api("/api/system"));
   } catch {
-    $("hbDot").classList.remove("dot--ok");
-    const staleFor = Date.now() - state.lastSystemOkAt;
-    $("systemMeta").textContent = staleFor ? `offline (${Math.round(staleFor / 1000)}s)` : "offline";
+    markOffline();
   }
 }
 
+// Polling is only the fallback while the event stream is down.
+function startPolling() {
+  if (state.polls.length) return;
+  state.polls.push(
+    setInterval(pollSystem, 3000),
+    setInterval(() => syncChanges().catch(() => {}), 5000),
+  );
+}
+
+function stopPolling() {
+  while (state.polls.length) clearInterval(state.polls.pop());
+}
+
+function connectStream() {
+  if (!window.EventSource) return startPolling();
+  const es = new EventSource("/api/events");
+  es.addEventListener("open", () => {
+    stopPolling();
+    // Catch up on anything missed while disconnected.
+    syncChanges().catch(() => {});
+  });
+  es.addEventListener("error", () => {
+    markOffline();
+    startPolling();
+  });
+  es.addEventListener("system", (ev) => onSystem(JSON.parse(ev.data)));
+  es.addEventListener("shift", () => syncChanges().catch(() => {}));
+  es.addEventListener("tasks", () => syncChanges().catch(() => {}));
+}
+
 function startClock() {
   const tick = () => {
     const d = new Date();
@@ -201,7 +337,7 @@ async function boot() {
       const r = await api("/api/shift/start", { method: "POST", body: "{}" });
       state.shift = r.shift;
       renderShift();
-      await refreshTasks();
+      await syncChanges();
       if (r.carried_task_count) toast(`Carried ${r.carried_task_count} task(s).`);
       else if (r.already_active) toast("Shift already active.");
       else toast("Shift started.");
@@ -214,9 +350,7 @@ async function boot() {
     try {
       await api("/api/shift/end", { method: "POST", body: "{}" });
       toast("Shift ended.");
-      await refreshShift();
-      state.tasks = [];
-      renderTasks();
+      await syncChanges();
     } catch (e) {
       toast(e.message);
     }
@@ -245,18 +379,15 @@ async function boot() {
     $("taskTitle").value = "";
     try {
       await api("/api/tasks", { method: "POST", body: JSON.stringify({ title }) });
-      await refreshTasks();
+      await syncChanges();
     } catch (e) {
       toast(e.message);
     }
   });
 
-  await refreshShift();
-  await refreshTasks();
+  await syncChanges();
   await pollSystem();
-  setInterval(pollSystem, 3000);
-  setInterval(refreshShift, 5000);
-  setInterval(refreshTasks, 5000);
+  connectStream();
 }
 
 boot();
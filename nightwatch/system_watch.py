@@ -1,11 +1,18 @@
 from __future__ import annotations
 
+import abc
+import heapq
 import socket
+import threading
+import time
+from collections.abc import Callable
 from datetime import datetime, timezone
 from pathlib import Path
 
 import psutil
 
+from nightwatch.telemetry import registry, timed
+
 
 def _read_pi_temp_c() -> float | None:
     # Common on Raspberry Pi OS
@@ -50,21 +57,497 @@ def _network_up(timeout_s: float = 0.6) -> bool:
         return False
 
 
-def read_system_snapshot() -> dict:
-    cpu = float(psutil.cpu_percent(interval=0.15))
-    vm = psutil.virtual_memory()
-    du = psutil.disk_usage("/")
-
-    return {
-        "at": datetime.now(timezone.utc),
-        "cpu_percent": cpu,
-        "ram_percent": float(vm.percent),
-        "ram_used_mb": int(vm.used / (1024 * 1024)),
-        "ram_total_mb": int(vm.total / (1024 * 1024)),
-        "disk_percent": float(du.percent),
-        "disk_used_gb": round(du.used / (1024 * 1024 * 1024), 2),
-        "disk_total_gb": round(du.total / (1024 * 1024 * 1024), 2),
-        "temp_c": _read_any_temp_c(),
-        "network_up": _network_up(),
-    }
+# --- collectors ---
+#
+# A collector reads one group of fields on its own cadence. Register more with
+# `@register_collector` on a Collector subclass (or any zero-argument factory
+# returning one); every sampler built afterwards picks it up.
+
+
+class Collector(abc.ABC):
+    """
+    Base for sampler collectors. `collect()` returns the fields it owns,
+    merged into each snapshot (the last good values are kept between runs
+    and after failures; `defaults` stand in before the first run).
+    """
+
+    name = ""
+    # Seconds between runs; 0 = every sampler tick.
+    interval_s = 0.0
+    # A run that takes longer counts as failed (it is left to finish on its
+    # own thread and not started again until it does).
+    timeout_s = 2.0
+    # Largest share of its interval a collector may spend on average; slower
+    # ones get their interval stretched.
+    budget = 0.1
+    defaults: dict = {}
+
+    @abc.abstractmethod
+    def collect(self) -> dict:
+        """Current values of the fields this collector owns, by snapshot key."""
+
+
+_FACTORIES: list[Callable[[], Collector]] = []
+
+
+def register_collector(factory: Callable[[], Collector]) -> Callable[[], Collector]:
+    # Fail here, not on the sampler thread, for a subclass missing collect().
+    if isinstance(factory, type) and getattr(factory, "__abstractmethods__", None):
+        raise TypeError(f"{factory.__name__} must implement {', '.join(sorted(factory.__abstractmethods__))}()")
+    _FACTORIES.append(factory)
+    return factory
+
+
+def default_collectors() -> list[Collector]:
+    """Fresh instances of every registered collector."""
+    return [f() for f in _FACTORIES]
+
+
+@register_collector
+class CpuCollector(Collector):
+    name = "cpu"
+    defaults = {"cpu_percent": 0.0}
+
+    def __init__(self) -> None:
+        # First run blocks briefly for a baseline; later ones measure since the previous run.
+        self.first_interval: float | None = 0.15
+
+    def collect(self) -> dict:
+        cpu = float(psutil.cpu_percent(interval=self.first_interval))
+        self.first_interval = None
+        return {"cpu_percent": cpu}
+
+
+@register_collector
+class MemoryCollector(Collector):
+    name = "memory"
+    defaults = {"ram_percent": 0.0, "ram_used_mb": 0, "ram_total_mb": 0}
+
+    def collect(self) -> dict:
+        vm = psutil.virtual_memory()
+        return {
+            "ram_percent": float(vm.percent),
+            "ram_used_mb": int(vm.used / (1024 * 1024)),
+            "ram_total_mb": int(vm.total / (1024 * 1024)),
+        }
+
+
+# Pseudo and image filesystems that never fill up in a way operators act on.
+_SKIP_FSTYPES = {"squashfs", "iso9660", "tmpfs", "devtmpfs", "overlay", "proc", "sysfs"}
+_MAX_MOUNTS = 32
+_GB = 1024 * 1024 * 1024
+
+
+@register_collector
+class DiskCollector(Collector):
+    """Usage of "/" (the headline disk_* fields) and of every real mount."""
+
+    name = "disks"
+    interval_s = 30.0
+    defaults = {"disk_percent": 0.0, "disk_used_gb": 0.0, "disk_total_gb": 0.0, "disks": []}
+
+    def collect(self) -> dict:
+        out: dict = {}
+        disks = []
+        seen: set[str] = set()
+        mounts = [p.mountpoint for p in psutil.disk_partitions(all=False) if p.fstype not in _SKIP_FSTYPES]
+        for mount in ["/", *mounts]:
+            if mount in seen or len(disks) >= _MAX_MOUNTS:
+                continue
+            seen.add(mount)
+            try:
+                du = psutil.disk_usage(mount)
+            except OSError:
+                continue
+            used_gb, total_gb = round(du.used / _GB, 2), round(du.total / _GB, 2)
+            disks.append({"mount": mount, "percent": float(du.percent), "used_gb": used_gb, "total_gb": total_gb})
+            if mount == "/":
+                out.update(disk_percent=float(du.percent), disk_used_gb=used_gb, disk_total_gb=total_gb)
+        out["disks"] = disks
+        return out
+
+
+@register_collector
+class TemperatureCollector(Collector):
+    name = "temperature"
+    interval_s = 15.0
+    defaults = {"temp_c": None}
+
+    def collect(self) -> dict:
+        return {"temp_c": _read_any_temp_c()}
+
+
+@register_collector
+class NetworkCollector(Collector):
+    name = "network"
+    interval_s = 10.0
+    defaults = {"network_up": False}
+
+    def collect(self) -> dict:
+        return {"network_up": _network_up()}
+
+
+_MAX_INTERFACES = 32
+
+
+@register_collector
+class InterfaceCollector(Collector):
+    """Per-interface receive/transmit rates from byte-counter deltas between runs."""
+
+    name = "interfaces"
+    defaults = {"interfaces": []}
+
+    def __init__(self) -> None:
+        self._prev: tuple[float, dict[str, tuple[int, int]]] | None = None
+
+    def collect(self) -> dict:
+        now = time.monotonic()
+        counters = {
+            nic: (c.bytes_recv, c.bytes_sent) for nic, c in psutil.net_io_counters(pernic=True).items() if nic != "lo"
+        }
+        prev, self._prev = self._prev, (now, counters)
+        if prev is None or now <= prev[0]:
+            return {"interfaces": []}  # rates need two readings
+        elapsed = now - prev[0]
+        rows = []
+        for nic, (rx, tx) in sorted(counters.items()):
+            if len(rows) >= _MAX_INTERFACES:
+                break
+            before = prev[1].get(nic)
+            # New interface, or counters reset (driver reload, wrap): no rate this round.
+            if before is None or rx < before[0] or tx < before[1]:
+                continue
+            rx_bps = round((rx - before[0]) / elapsed, 1)
+            tx_bps = round((tx - before[1]) / elapsed, 1)
+            rows.append({"name": nic, "rx_bps": rx_bps, "tx_bps": tx_bps})
+        return {"interfaces": rows}
+
+
+def read_system_snapshot(cpu_interval: float | None = 0.15) -> dict:
+    """
+    One-off snapshot from every registered collector, run inline without
+    scheduling. `cpu_interval=None` measures CPU since the previous call
+    instead of blocking (only meaningful once a baseline exists).
+    """
+    snap: dict = {"at": datetime.now(timezone.utc)}
+    for c in default_collectors():
+        if isinstance(c, CpuCollector):
+            c.first_interval = cpu_interval
+        snap.update(c.defaults)
+        try:
+            snap.update(c.collect() or {})
+        except Exception:
+            pass
+    return snap
+
+
+# --- scheduling ---
+
+# Upper bound for stretched and backed-off intervals.
+MAX_BACKOFF_S = 600.0
+
+
+class _Run(threading.Thread):
+    """One collector call on its own daemon thread, so a hung read can't block the sampler or shutdown."""
+
+    def __init__(self, collector: Collector) -> None:
+        super().__init__(name=f"nightwatch-collect-{collector.name}", daemon=True)
+        self.collector = collector
+        self.result: dict | None = None
+        self.error: BaseException | None = None
+        self.cost_s = 0.0
+
+    def run(self) -> None:
+        t0 = time.perf_counter()
+        try:
+            self.result = self.collector.collect() or {}
+        except BaseException as e:
+            self.error = e
+        finally:
+            self.cost_s = time.perf_counter() - t0
+
+
+class _Slot:
+    def __init__(self, collector: Collector) -> None:
+        self.collector = collector
+        self.interval_s = collector.interval_s
+        self.values = dict(collector.defaults)
+        self.next_due = 0.0
+        self.last_run = 0.0
+        self.running: _Run | None = None  # in progress, or outlived its timeout
+        self.runs = 0
+        self.failures = 0  # consecutive
+        self.errors = 0
+        self.last_error: str | None = None
+        self.cost_avg_s = 0.0
+        self.last_cost_s = 0.0
+
+
+class CollectorScheduler:
+    """
+    Runs each collector when it is due, in parallel, each bounded by its
+    timeout, and merges the latest values into one snapshot. Costs are
+    tracked per collector: one that fails or times out backs off
+    exponentially, and one that costs more than `budget` of its interval
+    runs less often until it gets cheaper again.
+    """
+
+    def __init__(self, collectors: list[Collector], intervals: dict[str, float] | None = None) -> None:
+        self._slots = [_Slot(c) for c in collectors]
+        self._lock = threading.Lock()
+        if intervals:
+            self.configure(intervals)
+
+    def add(self, collector: Collector) -> None:
+        with self._lock:
+            self._slots.append(_Slot(collector))
+
+    def configure(self, intervals: dict[str, float]) -> None:
+        """Override intervals by collector name (seconds; 0 = every tick)."""
+        with self._lock:
+            for slot in self._slots:
+                if slot.collector.name in intervals:
+                    slot.interval_s = max(0.0, float(intervals[slot.collector.name]))
+
+    def _base_s(self, slot: _Slot, tick_s: float) -> float:
+        return max(slot.interval_s, tick_s)
+
+    def _schedule(self, slot: _Slot, now: float, tick_s: float, stretched_s: float) -> None:
+        # Backoff and budget stretch never go past MAX_BACKOFF_S, but a longer
+        # configured interval is always honoured.
+        base = self._base_s(slot, tick_s)
+        slot.last_run = now
+        slot.next_due = now + max(base, min(stretched_s, MAX_BACKOFF_S))
+
+    def collect(self, tick_s: float = 0.0) -> dict:
+        """Run what is due (expected to be called every `tick_s`) and return the merged snapshot."""
+        now = time.monotonic()
+        # Half a tick of slack so "every 30 s" on a 3 s tick doesn't slip to 33 s.
+        horizon = now + tick_s / 2
+        runs: list[tuple[_Slot, _Run]] = []
+        # The lock only guards slot state; runs are joined outside it so stats() never waits on a collector.
+        with self._lock:
+            for slot in self._slots:
+                if slot.running is not None:
+                    if slot.running.is_alive():
+                        continue
+                    slot.running = None
+                if slot.next_due <= horizon:
+                    run = slot.running = _Run(slot.collector)
+                    run.start()
+                    runs.append((slot, run))
+        for slot, run in runs:
+            run.join(max(0.0, now + slot.collector.timeout_s - time.monotonic()))
+        with self._lock:
+            for slot, run in runs:
+                if run.is_alive():
+                    # Left in slot.running, so it isn't started again until it returns.
+                    self._failed(slot, now, tick_s, f"timed out after {slot.collector.timeout_s:g}s")
+                    continue
+                slot.running = None
+                slot.last_cost_s = run.cost_s
+                registry.observe("nightwatch_collector_duration_seconds", run.cost_s, slot.collector.name)
+                if run.error is not None:
+                    self._failed(slot, now, tick_s, str(run.error) or type(run.error).__name__)
+                    continue
+                slot.values.update(run.result or {})
+                # The first run sets baselines (CPU blocks for one reading, the process
+                # scan fills its cache), so the average starts from the second.
+                if slot.runs == 1:
+                    slot.cost_avg_s = run.cost_s
+                elif slot.runs > 1:
+                    slot.cost_avg_s = 0.8 * slot.cost_avg_s + 0.2 * run.cost_s
+                slot.runs += 1
+                slot.failures = 0
+                # Stretch the interval until the collector fits its budget.
+                budget_s = slot.cost_avg_s / slot.collector.budget if slot.collector.budget > 0 else 0.0
+                self._schedule(slot, now, tick_s, budget_s)
+            snap: dict = {"at": datetime.now(timezone.utc)}
+            for slot in self._slots:
+                snap.update(slot.values)
+            return snap
+
+    def _failed(self, slot: _Slot, now: float, tick_s: float, error: str) -> None:
+        slot.failures += 1
+        slot.errors += 1
+        slot.last_error = error
+        self._schedule(slot, now, tick_s, self._base_s(slot, tick_s) * 2**slot.failures)
+
+    def stats(self) -> list[dict]:
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "name": s.collector.name,
+                    "interval_s": s.interval_s,
+                    # after budget stretch or failure backoff
+                    "effective_interval_s": round(s.next_due - s.last_run, 3) if s.last_run else s.interval_s,
+                    "timeout_s": s.collector.timeout_s,
+                    "runs": s.runs,
+                    "errors": s.errors,
+                    "failing": s.failures > 0,
+                    "last_error": s.last_error,
+                    "avg_cost_ms": round(s.cost_avg_s * 1000, 3),
+                    "last_cost_ms": round(s.last_cost_s * 1000, 3),
+                    "next_in_s": round(max(0.0, s.next_due - now), 3),
+                }
+                for s in self._slots
+            ]
+
+
+class ProcessMonitor(Collector):
+    """
+    Per-process CPU and memory, refreshed incrementally by `scan()` (added to
+    the sampler as a collector, so it runs on the sampler's tick unless
+    configured otherwise). `psutil.Process` objects and names are cached
+    across scans and checked against pid reuse; each scan reads CPU times and
+    RSS per live process, and CPU% is the CPU-time delta since the previous
+    scan (100 = one full core).
+    """
+
+    name = "processes"
+    timeout_s = 5.0
+
+    def __init__(self) -> None:
+        self._procs: dict[int, tuple[psutil.Process, str]] = {}
+        # pid -> user+system CPU seconds at the previous scan
+        self._cpu_s: dict[int, float] = {}
+        self._scanned: float | None = None
+        # (rows, wall time): rows are (pid, name, cpu_percent, rss_bytes)
+        self._latest: tuple[list[tuple[int, str, float, int]], datetime] | None = None
+        self._lock = threading.Lock()
+
+    def scan(self) -> None:
+        with self._lock, timed("nightwatch_process_scan_seconds"):
+            now = time.monotonic()
+            elapsed = now - self._scanned if self._scanned is not None else None
+            pids = psutil.pids()
+            live = set(pids)
+            for pid in [p for p in self._procs if p not in live]:
+                del self._procs[pid]
+            rows: list[tuple[int, str, float, int]] = []
+            cpu_s: dict[int, float] = {}
+            for pid in pids:
+                entry = self._procs.get(pid)
+                # Same pid, different process (pid reused since the last scan):
+                # drop the cached handle, name and CPU baseline.
+                if entry is not None and not entry[0].is_running():
+                    del self._procs[pid]
+                    self._cpu_s.pop(pid, None)
+                    entry = None
+                try:
+                    if entry is None:
+                        proc = psutil.Process(pid)
+                        entry = self._procs[pid] = (proc, proc.name())
+                    proc, name = entry
+                    # Two small reads (/proc/<pid>/stat and statm on Linux); they
+                    # share nothing, so oneshot() would only add overhead.
+                    t = proc.cpu_times()
+                    rss = proc.memory_info().rss
+                except psutil.NoSuchProcess:
+                    self._procs.pop(pid, None)
+                    continue
+                except psutil.Error:
+                    continue  # no access; skipped rather than reported as idle
+                total = t.user + t.system
+                before = self._cpu_s.get(pid)
+                cpu = 0.0 if before is None or not elapsed else max(0.0, (total - before) / elapsed * 100.0)
+                cpu_s[pid] = total
+                rows.append((pid, name, round(cpu, 1), rss))
+            self._cpu_s = cpu_s
+            self._scanned = now
+            self._latest = (rows, datetime.now(timezone.utc))
+
+    def collect(self) -> dict:
+        self.scan()
+        return {}  # served from top(), not part of the snapshot
+
+    def top(self, n: int, by: str = "cpu") -> dict | None:
+        """Top `n` processes by "cpu" or "rss" from the latest scan, or None before the first."""
+        cur = self._latest
+        if cur is None:
+            return None
+        rows, at = cur
+        key = (lambda r: (r[2], r[3])) if by == "cpu" else (lambda r: r[3])
+        return {
+            "at": at,
+            "count": len(rows),
+            "items": [
+                {"pid": pid, "name": name, "cpu_percent": cpu, "rss_mb": round(rss / (1024 * 1024), 1)}
+                for pid, name, cpu, rss in heapq.nlargest(n, rows, key=key)
+            ],
+        }
+
+
+class SystemSampler:
+    """
+    Keeps one shared snapshot fresh on a background thread.
+    Readers get the latest sample without touching psutil.
+    Each tick runs whichever collectors are due (see CollectorScheduler).
+    """
+
+    def __init__(self, interval_s: float = 3.0, collectors: list[Collector] | None = None) -> None:
+        self.interval_s = interval_s
+        self.scheduler = CollectorScheduler(default_collectors() if collectors is None else collectors)
+        # (snapshot, monotonic time it was taken)
+        self._latest: tuple[dict, float] | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._listeners: list[Callable[[dict], None]] = []
+
+    @property
+    def interval_s(self) -> float:
+        return self._interval_s
+
+    @interval_s.setter
+    def interval_s(self, value: float) -> None:
+        # Floor applies however it is set (config may say 0); the loop never spins.
+        self._interval_s = max(0.5, float(value))
+
+    def add_listener(self, fn: Callable[[dict], None]) -> None:
+        """Call `fn(snapshot)` after every sample (on the sampler thread)."""
+        self._listeners.append(fn)
+
+    def sample(self) -> dict:
+        """Take a sample now, store it, and return it (age 0)."""
+        with timed("nightwatch_system_snapshot_seconds"):
+            snap = self.scheduler.collect(self.interval_s)
+        # Single reference swap; readers never see a half-built sample.
+        self._latest = (snap, time.monotonic())
+        for fn in self._listeners:
+            try:
+                fn(snap)
+            except Exception:
+                pass
+        return {**snap, "age_s": 0.0}
+
+    def latest(self) -> dict | None:
+        """Latest stored sample with its age in seconds, or None before the first one."""
+        cur = self._latest
+        if cur is None:
+            return None
+        snap, taken = cur
+        return {**snap, "age_s": round(time.monotonic() - taken, 3)}
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                self.sample()
+            except Exception:
+                pass
+            elapsed = time.monotonic() - started
+            self._stop.wait(max(0.0, self.interval_s - elapsed))
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="nightwatch-sampler", daemon=True)
+        self._thread.start()
 
+    def stop(self, timeout_s: float = 2.0) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=timeout_s)
+            self._thread = None
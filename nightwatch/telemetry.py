@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+# Always-on, low-overhead instrumentation: fixed-bucket histograms kept in
+# process memory and rendered as Prometheus text on /api/metrics.
+# Stdlib only, so any module (including the CLI path) can record into it.
+
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+# Latency buckets in seconds: sub-millisecond DB calls up to slow page loads.
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+# Backups run for seconds to minutes.
+SLOW_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+
+_HELP = {
+    "nightwatch_http_request_duration_seconds": "Time to response start per route.",
+    "nightwatch_http_request_db_seconds": "Database time spent per request.",
+    "nightwatch_db_query_duration_seconds": "Duration of individual SQL statements.",
+    "nightwatch_system_snapshot_seconds": "Time to collect one system snapshot.",
+    "nightwatch_process_scan_seconds": "Time to refresh per-process CPU and memory.",
+    "nightwatch_collector_duration_seconds": "Duration of each system collector run.",
+    "nightwatch_backup_duration_seconds": "Duration of backup runs that wrote something.",
+}
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        # name -> {label values: Histogram}, plus label names and buckets per metric
+        self._hists: dict[str, dict[tuple[str, ...], Histogram]] = {}
+        self._labels: dict[str, tuple[str, ...]] = {}
+        self._buckets: dict[str, tuple[float, ...]] = {}
+
+    def histogram(self, name: str, labels: tuple[str, ...] = (), buckets: tuple[float, ...] = FAST_BUCKETS) -> None:
+        with self._lock:
+            if name not in self._hists:
+                self._hists[name] = {}
+                self._labels[name] = labels
+                self._buckets[name] = buckets
+
+    def observe(self, name: str, value: float, *label_values: str) -> None:
+        with self._lock:
+            series = self._hists[name]
+            h = series.get(label_values)
+            if h is None:
+                h = series[label_values] = Histogram(self._buckets[name])
+            h.observe(value)
+
+    def render(self) -> str:
+        """Prometheus text exposition format (0.0.4)."""
+        out: list[str] = []
+        with self._lock:
+            for name, series in self._hists.items():
+                labels = self._labels[name]
+                out.append(f"# HELP {name} {_HELP.get(name, name)}")
+                out.append(f"# TYPE {name} histogram")
+                for values, h in sorted(series.items()):
+                    base = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(labels, values))
+                    sep = "," if base else ""
+                    cumulative = 0
+                    for le, n in zip((*h.buckets, "+Inf"), h.counts):
+                        cumulative += n
+                        out.append(f'{name}_bucket{{{base}{sep}le="{le}"}} {cumulative}')
+                    braces = f"{{{base}}}" if base else ""
+                    out.append(f"{name}_sum{braces} {h.total:.6f}")
+                    out.append(f"{name}_count{braces} {h.count}")
+        return "\n".join(out) + "\n"
+
+
+def _escape(v: str) -> str:
+    return v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry = Registry()
+registry.histogram("nightwatch_http_request_duration_seconds", ("method", "route", "status"))
+registry.histogram("nightwatch_http_request_db_seconds", ("method", "route"))
+registry.histogram("nightwatch_db_query_duration_seconds")
+registry.histogram("nightwatch_system_snapshot_seconds")
+registry.histogram("nightwatch_process_scan_seconds")
+registry.histogram("nightwatch_collector_duration_seconds", ("collector",))
+registry.histogram("nightwatch_backup_duration_seconds", ("mode",), SLOW_BUCKETS)
+
+# Per-request accumulator [db seconds, statement count], set by the middleware.
+# Statements run outside a request (sampler, backups, group-commit writer)
+# still land in the global query histogram.
+request_db: ContextVar[list | None] = ContextVar("nightwatch_request_db", default=None)
+
+
+def record_query(seconds: float) -> None:
+    registry.observe("nightwatch_db_query_duration_seconds", seconds)
+    acc = request_db.get()
+    if acc is not None:
+        acc[0] += seconds
+        acc[1] += 1
+
+
+class timed:
+    """`with timed("metric", *labels):` observes the block's duration (also if it raises)."""
+
+    __slots__ = ("name", "labels", "t0")
+
+    def __init__(self, name: str, *labels: str) -> None:
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self) -> None:
+        self.t0 = time.perf_counter()
+
+    def __exit__(self, *exc: object) -> None:
+        registry.observe(self.name, time.perf_counter() - self.t0, *self.labels)
+
+
+def _route_label(scope) -> str:
+    # Route templates, not raw paths, keep the label set small and fixed.
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    if "endpoint" not in scope:
+        return "unmatched"
+    if scope.get("root_path", "") != scope.get("app_root_path", ""):
+        return scope["root_path"]  # mounted app, e.g. /static
+    return scope["path"]  # plain Starlette routes (/docs, /openapi.json); none take path params
+
+
+class TimingMiddleware:
+    """
+    Pure ASGI middleware: per-route latency and DB time, measured up to the
+    start of the response (so long-lived streams don't skew the histograms),
+    and reported back to the client in a `Server-Timing` header.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        acc = [0.0, 0]
+        token = request_db.set(acc)
+        t0 = time.perf_counter()
+
+        async def send_timed(message) -> None:
+            if message["type"] == "http.response.start":
+                elapsed = time.perf_counter() - t0
+                path = _route_label(scope)
+                method = scope["method"]
+                registry.observe(
+                    "nightwatch_http_request_duration_seconds", elapsed, method, path, str(message["status"])
+                )
+                registry.observe("nightwatch_http_request_db_seconds", acc[0], method, path)
+                timing = f'app;dur={elapsed * 1000:.2f}, db;dur={acc[0] * 1000:.2f};desc="{acc[1]} queries"'
+                message["headers"] = [*message.get("headers", ()), (b"server-timing", timing.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            request_db.reset(token)
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import asyncio
+import queue
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from nightwatch.db import connect_writer
+from nightwatch.services import BATCH_KEY, notify
+
+_STOP = object()
+
+
+class WriteQueue:
+    """
+    Single-writer pipeline with group commit.
+
+    Mutations are `fn(session, *args)` service calls. One thread owns one
+    connection, drains whatever arrives within `window_s` of the first queued
+    call, runs it all in one transaction (one fsync), then resolves each
+    caller's future. If the batch fails, its calls are retried one by one so
+    only the failing call sees the error.
+    """
+
+    def __init__(self, window_s: float = 0.005, max_batch: int = 64) -> None:
+        self.window_s = window_s
+        self.max_batch = max_batch
+        self._q: queue.Queue = queue.Queue()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="nightwatch-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout_s: float = 5.0) -> None:
+        if not self._thread:
+            return
+        self._q.put(_STOP)
+        self._thread.join(timeout=timeout_s)
+        self._thread = None
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        fut: Future = Future()
+        self._q.put((fn, args, fut))
+        return fut
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def _collect(self, first) -> tuple[list, bool]:
+        batch = [first]
+        deadline = time.monotonic() + self.window_s
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._q.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self) -> None:
+        conn = connect_writer()
+        try:
+            stopping = False
+            while not stopping:
+                first = self._q.get()
+                if first is _STOP:
+                    break
+                batch, stopping = self._collect(first)
+                self._process(conn, batch)
+            # Drain anything submitted before stop() so no caller hangs.
+            while True:
+                try:
+                    item = self._q.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not _STOP:
+                    self._process(conn, [item])
+        finally:
+            conn.close()
+
+    def _process(self, conn, batch: list) -> None:
+        # Callers cancelled while queued (client went away) are dropped; the
+        # rest can no longer be cancelled, so resolving them can't fail.
+        batch = [item for item in batch if item[2].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        try:
+            if not self._commit_batch(conn, batch):
+                for item in batch:
+                    self._commit_batch(conn, [item])
+        except Exception as e:
+            # Never let one batch end the writer thread; fail whoever is still waiting.
+            for _, _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+
+    def _commit_batch(self, conn, batch: list) -> bool:
+        """Run `batch` in one transaction. Returns False if it should be retried singly."""
+        pending: list[tuple[str, dict]] = []
+        results: list[tuple[Future, Any]] = []
+        db = Session(bind=conn, autoflush=False, expire_on_commit=False)
+        db.info[BATCH_KEY] = pending
+        try:
+            for fn, args, fut in batch:
+                try:
+                    results.append((fut, fn(db, *args)))
+                except Exception as e:
+                    db.rollback()
+                    if len(batch) > 1:
+                        return False
+                    fut.set_exception(e)
+                    return True
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            if len(batch) > 1:
+                return False
+            batch[0][2].set_exception(e)
+            return True
+        finally:
+            db.expunge_all()
+            db.close()
+
+        for topic, data in pending:
+            notify(topic, data)
+        for fut, result in results:
+            fut.set_result(result)
+        return True